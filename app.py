@@ -1,9 +1,25 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 from database import NewsDB
 
 app = Flask(__name__)
 db = NewsDB()
 
+# Максимальный размер страницы API
+MAX_PAGE_SIZE = 100
+
+
+def _page_args(default_limit):
+    """limit, offset и курсор (?cursor=<published_at>:<id>) из параметров запроса"""
+    limit = min(max(request.args.get('limit', default_limit, type=int), 1), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    cursor = request.args.get('cursor')
+    before = None
+    if cursor:
+        published_at, _, news_id = cursor.partition(':')
+        if published_at.isdigit() and news_id.isdigit():
+            before = (int(published_at), int(news_id))
+    return limit, offset, before
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -13,33 +29,55 @@ def get_recent_news():
     """
     Все свежие новости из РБК (инвестиции) и Telegram
     Максимум 20 штук по свежести
+    
+    Параметры: limit, offset, cursor, source, dedupe (по умолчанию 1 - одна
+    новость на сюжет, 0 - все дубликаты), archive=1 - продолжать ленту
+    архивом старых новостей. Курсор следующей страницы возвращается
+    в заголовке X-Next-Cursor.
     """
-    all_news = db.get_all_news()
-    # Сортируем по дате (самые свежие первыми)
-    sorted_news = sorted(all_news, key=lambda x: x['date'], reverse=True)
-    return jsonify(sorted_news[:20])
+    limit, offset, before = _page_args(20)
+    news, cursor = db.get_news(limit=limit, offset=offset, before=before,
+                               source=request.args.get('source'),
+                               dedupe=request.args.get('dedupe', 1, type=int) != 0,
+                               include_archive=request.args.get('archive', 0, type=int) != 0)
+    response = jsonify(news)
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = f"{cursor[0]}:{cursor[1]}"
+    return response
 
 @app.route('/api/news/sberbank')
 def get_sberbank_news():
     """
     Новости про Сбербанк из РБК и Telegram
     Максимум 5 из РБК + максимум 5 из Telegram
-    """
-    sber_news = db.get_all_news(category='sberbank')
-    
-    # Разделяем по источникам
-    rbc_news = [n for n in sber_news if 'РБК' in n['source']]
-    telegram_news = [n for n in sber_news if 'Telegram' in n['source']]
     
-    # Берем максимум 5 из каждого источника (самые свежие)
-    rbc_sorted = sorted(rbc_news, key=lambda x: x['date'], reverse=True)[:5]
-    telegram_sorted = sorted(telegram_news, key=lambda x: x['date'], reverse=True)[:5]
+    Параметры: dedupe=1 - одна новость на сюжет
+    """
+    return jsonify(db.get_top_per_source(per_source=5, category='sberbank',
+                                         dedupe=request.args.get('dedupe', 0, type=int) != 0))
+
+@app.route('/api/news/search')
+def search_news():
+    """
+    Полнотекстовый поиск с учетом словоформ, результаты по релевантности
     
-    # Объединяем и сортируем по дате
-    combined = rbc_sorted + telegram_sorted
-    result = sorted(combined, key=lambda x: x['date'], reverse=True)
+    Параметры: q - запрос, limit, offset, category
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Параметр q обязателен'}), 400
+    limit, offset, _ = _page_args(20)
+    return jsonify(db.search(query, limit=limit, offset=offset, category=request.args.get('category')))
+
+@app.route('/api/stats')
+def get_stats():
+    """
+    Количество новостей по категориям, источникам и дням (из агрегатов, без списка новостей)
     
-    return jsonify(result)
+    Параметры: days - сколько последних дней вернуть в by_day (по умолчанию 30)
+    """
+    days = max(request.args.get('days', 30, type=int), 1)
+    return jsonify(db.get_stats(days=days))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Загрузка полного текста статей РБК с дисковым кэшем
+
+import hashlib
+import json
+import os
+import requests
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from fetch_engine import FetchEngine
+from rbc_extract import extract_article_text
+
+
+class ArticleFetcher:
+    """
+    Дополняет записи парсеров полным текстом статей.
+
+    Текст каждой статьи хранится на диске в cache/articles/<sha1(url)>.json
+    вместе с хэшем исходной страницы, поэтому повторные запуски и повторный
+    импорт не скачивают статьи заново. Загружаются только новые URL;
+    параллельность и частота запросов ограничиваются движком загрузки.
+
+    Страницы, из которых текст не извлекся, загружаются повторно через
+    EMPTY_RETRY_SECONDS. Текст извлекается один раз на содержимое страницы:
+    для неизменившейся страницы и для одинаковых страниц под разными URL
+    он берется по хэшу (cache/articles/bodies/<sha1(страницы)>.json).
+    """
+
+    # Через сколько секунд снова загружать страницу, из которой не извлекся текст
+    EMPTY_RETRY_SECONDS = 6 * 3600
+
+    def __init__(self, cache_dir: str = 'cache/articles', engine: Optional[FetchEngine] = None):
+        """
+        Args:
+            cache_dir: Каталог кэша текстов статей
+            engine: Движок загрузки (по умолчанию - собственный FetchEngine)
+        """
+        self.cache_dir = cache_dir
+        self.engine = engine or FetchEngine()
+        self.cached = 0
+        self.fetched = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'bodies', digest + '.json')
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _write(path: str, entry: Dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _load(self, url: str) -> Optional[Dict]:
+        return self._read(self._path(url))
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        """Можно ли использовать запись кэша без новой загрузки"""
+        return bool(entry.get('text')) or time.time() - entry.get('checked_at', 0) < self.EMPTY_RETRY_SECONDS
+
+    def _extract(self, url: str, body: bytes, digest: str) -> str:
+        """Текст страницы: из прошлой загрузки того же URL, по хэшу страницы или разбором"""
+        previous = self._load(url)
+        if previous is not None and previous.get('sha1') == digest:
+            return previous.get('text', '')
+        known = self._read(self._body_path(digest))
+        if known is not None:
+            return known['text']
+        text = extract_article_text(body)
+        if text:
+            self._write(self._body_path(digest), {'text': text})
+        return text
+
+    def _download(self, url: str) -> Optional[str]:
+        """Скачивает статью и извлекает текст; None при ошибке"""
+        try:
+            response = self.engine.get(url, timeout=10)
+            body = response.content if response.status_code == 200 else None
+        except requests.exceptions.RequestException:
+            body = None
+        if body is None:
+            with self._lock:
+                self.failed += 1
+            return None
+
+        digest = hashlib.sha1(body).hexdigest()
+        text = self._extract(url, body, digest)
+        self._write(self._path(url), {
+            'url': url,
+            'sha1': digest,
+            'text': text,
+            'checked_at': time.time(),
+        })
+        with self._lock:
+            self.fetched += 1
+        return text
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Тексты статей по списку URL: из кэша или, для новых, с сайта.
+
+        Returns:
+            Dict[str, str]: {url: текст} для статей, текст которых удалось получить
+        """
+        texts: Dict[str, str] = {}
+        missing: List[str] = []
+        for url in dict.fromkeys(urls):
+            entry = self._load(url)
+            if entry is not None and self._is_fresh(entry):
+                self.cached += 1
+                texts[url] = entry['text']
+            else:
+                missing.append(url)
+
+        for url, text in zip(missing, self.engine.map(self._download, missing)):
+            if text is not None:
+                texts[url] = text
+
+        return {url: text for url, text in texts.items() if text}
+
+    def enrich(self, records: List[Dict], skip: Iterable[str] = ()) -> List[Dict]:
+        """
+        Добавляет полный текст в поле 'content' записей РБК ('url', 'title').
+
+        Args:
+            records: Записи парсеров РБК
+            skip: URL, которые не нужно загружать (например, уже сохраненные в БД)
+        """
+        skip = set(skip)
+        texts = self.fetch_many(
+            news['url'] for news in records if news.get('url') and news['url'] not in skip
+        )
+        for news in records:
+            if news.get('url') in texts:
+                news['content'] = texts[news['url']]
+        return records
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Бенчмарк извлечения статей со страниц рубрик РБК: BeautifulSoup против rbc_extract
+#
+# Запуск из корня проекта:
+#   python3 benchmarks/bench_extract.py [--rounds 20] [каталог_с_html]
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rbc_extract import extract_article_blocks, extract_feed_links  # noqa: E402
+
+
+def legacy_article_blocks(body: bytes):
+    """Прежний код RBCParser: полное дерево html.parser и регулярки в цикле"""
+    soup = BeautifulSoup(body, 'html.parser')
+    articles = soup.find_all(['a', 'div'], class_=re.compile(r'(item|card|news|article)', re.I))
+    extracted = []
+    for article in articles:
+        title_elem = article.find(['span', 'div', 'h3', 'h2'], class_=re.compile(r'(title|headline)', re.I))
+        if not title_elem:
+            title_elem = article
+        title = title_elem.get_text(strip=True)
+        link = None
+        if article.name == 'a':
+            link = article.get('href')
+        else:
+            link_elem = article.find('a')
+            if link_elem:
+                link = link_elem.get('href')
+        if not link:
+            continue
+        date_elem = article.find(['time', 'span'], class_=re.compile(r'(date|time)', re.I))
+        date_text = None
+        if date_elem:
+            date_text = date_elem.get('datetime') or date_elem.get_text(strip=True)
+        extracted.append({'title': title, 'link': link, 'date_text': date_text})
+    return extracted
+
+
+def legacy_feed_links(body: bytes, limit: int = 30):
+    """Прежний код RBCInvestmentsParser"""
+    soup = BeautifulSoup(body, 'html.parser')
+    articles = soup.find_all('a', class_=re.compile(r'(item__link|news-feed__item)'))
+    return [{'title': a.get_text(strip=True), 'url': a.get('href', '')} for a in articles[:limit]]
+
+
+def measure(fn, pages, rounds):
+    """Возвращает число страниц в секунду"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in pages:
+            fn(body)
+    elapsed = time.perf_counter() - start
+    return len(pages) * rounds / elapsed
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('fixtures', nargs='?', default=default_dir)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, '*.html')))
+    if not paths:
+        print(f"✗ Нет HTML-файлов в {args.fixtures}")
+        return
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    print(f"Страниц: {len(pages)}, повторов: {args.rounds}")
+    print("="*70)
+
+    for name, legacy, fast in [
+        ('RBCParser (блоки новостей)', legacy_article_blocks, extract_article_blocks),
+        ('RBCInvestmentsParser (лента)', legacy_feed_links, extract_feed_links),
+    ]:
+        # Результаты должны совпадать
+        for path, body in zip(paths, pages):
+            if legacy(body) != fast(body):
+                print(f"⚠ {name}: результаты различаются на {os.path.basename(path)}")
+
+        old_rate = measure(legacy, pages, args.rounds)
+        new_rate = measure(fast, pages, args.rounds)
+        print(f"{name}:")
+        print(f"  BeautifulSoup: {old_rate:8.1f} стр/сек")
+        print(f"  rbc_extract:   {new_rate:8.1f} стр/сек  (x{new_rate / old_rate:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# Проверка сюжетов: заголовки РБК и посты Telegram об одном событии
+# должны попадать в один сюжет, заголовки разных событий - в разные
+#
+# Каждая пара записывается в news.db с отдельной датой (дальше STORY_WINDOW
+# от других пар), поэтому сравниваются только записи внутри пары. Пост
+# Telegram получает заголовок так же, как в import_to_db.py.
+#
+# Запуск из корня проекта:
+#   python3 benchmarks/bench_stories.py [файл_пар.json]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import STORY_WINDOW, NewsDB  # noqa: E402
+from minhash import features, similarity  # noqa: E402
+
+
+def telegram_title(text: str) -> str:
+    return text[:100] + '...' if len(text) > 100 else text
+
+
+def main():
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'story_pairs.json')
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pairs', nargs='?', default=default_path)
+    args = parser.parse_args()
+
+    with open(args.pairs, 'r', encoding='utf-8') as f:
+        pairs = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = NewsDB(os.path.join(tmp, 'news.db'))
+        start = datetime(2025, 1, 1, 12, 0)
+        records = []
+        for number, (rbc, telegram) in enumerate(pairs['same'] + pairs['different']):
+            published = start + timedelta(seconds=number * 2 * STORY_WINDOW)
+            records.append({
+                'title': rbc, 'content': rbc, 'date': published.strftime('%Y-%m-%d %H:%M'),
+                'published': published.isoformat(), 'source': 'РБК', 'url': f'rbc/{number}',
+            })
+            records.append({
+                'title': telegram_title(telegram), 'content': telegram,
+                'date': published.strftime('%Y-%m-%d %H:%M'),
+                'published': (published + timedelta(hours=1)).isoformat(),
+                'source': 'Telegram @markettwits', 'url': f'telegram/{number}',
+            })
+        db.add_news_bulk(records)
+        stories = dict(db._connect().execute('SELECT url, story_id FROM news'))
+        db.close()
+
+    print(f"Пар: {len(pairs['same'])} одинаковых, {len(pairs['different'])} разных")
+    print("="*70)
+    results = {True: [0, 0], False: [0, 0]}
+    for number, record in enumerate(records[::2]):
+        expected = number < len(pairs['same'])
+        rbc, telegram = record['title'], records[2 * number + 1]['title']
+        merged = stories[f'rbc/{number}'] == stories[f'telegram/{number}']
+        results[expected][merged == expected] += 1
+        if merged != expected:
+            score = similarity(features(rbc) or frozenset(), features(telegram) or frozenset())
+            verdict = 'не объединены' if expected else 'объединены'
+            print(f"⚠ {verdict} (Жаккар {score:.2f}):\n    {rbc}\n    {telegram}")
+
+    print(f"Одно событие в одном сюжете: {results[True][1]} из {sum(results[True])}")
+    print(f"Разные события в разных сюжетах: {results[False][1]} из {sum(results[False])}")
+
+
+if __name__ == '__main__':
+    main()
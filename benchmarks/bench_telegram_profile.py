@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Бенчмарк профиля Chrome для Telegram: обычный против "только текст"
+#
+# Для каждого профиля прокручивает канал и выводит трафик и время прокрутки
+# в пересчете на 100 сообщений, а также память браузера после прокрутки.
+# Нужны Chrome и ChromeDriver.
+#
+# Запуск из корня проекта:
+#   python3 benchmarks/bench_telegram_profile.py [--messages 300] [канал]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_selenium_parser import TelegramSeleniumParser  # noqa: E402
+
+
+class MeasuredParser(TelegramSeleniumParser):
+    """Парсер с журналом сетевых событий Chrome"""
+
+    def _chrome_options(self):
+        chrome_options = super()._chrome_options()
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return chrome_options
+
+
+def transferred_bytes(driver) -> int:
+    """Сумма encodedDataLength завершенных запросов из журнала performance"""
+    total = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += int(message['params'].get('encodedDataLength', 0))
+    return total
+
+
+def browser_rss_mb(driver) -> float:
+    """Память всех процессов Chrome (нужен psutil), МБ"""
+    if psutil is None:
+        return float('nan')
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+    except psutil.Error:
+        return float('nan')
+
+
+def js_heap_mb(driver) -> float:
+    metrics = driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+    values = {metric['name']: metric['value'] for metric in metrics}
+    return values.get('JSHeapUsedSize', 0) / (1024 * 1024)
+
+
+def run_profile(channel: str, messages: int, text_only: bool) -> dict:
+    parser = MeasuredParser(headless=True, text_only=text_only)
+    driver = parser._create_driver()
+    parser.driver = driver
+    try:
+        driver.execute_cdp_cmd('Performance.enable', {})
+        start = time.perf_counter()
+        loaded = parser._scroll_to_load_messages(
+            f"https://t.me/s/{channel}", messages, on_messages=lambda batch: None
+        )
+        elapsed = time.perf_counter() - start
+        per_100 = 100 / max(loaded, 1)
+        return {
+            'loaded': loaded,
+            'traffic_mb': transferred_bytes(driver) / (1024 * 1024) * per_100,
+            'rss_mb': browser_rss_mb(driver),
+            'heap_mb': js_heap_mb(driver),
+            'seconds': elapsed * per_100,
+        }
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('channel', nargs='?', default='markettwits')
+    parser.add_argument('--messages', type=int, default=300)
+    args = parser.parse_args()
+
+    results = {}
+    for name, text_only in [('обычный', False), ('только текст', True)]:
+        results[name] = run_profile(args.channel, args.messages, text_only)
+
+    print("\n" + "="*70)
+    print(f"@{args.channel}: трафик и время - на 100 сообщений, память - после прокрутки "
+          f"{args.messages} сообщений")
+    print("="*70)
+    print(f"{'Профиль':<14}{'Трафик, МБ':>12}{'Chrome RSS, МБ':>16}{'Куча JS, МБ':>13}{'Прокрутка, с':>14}")
+    for name, result in results.items():
+        print(f"{name:<14}{result['traffic_mb']:>12.2f}{result['rss_mb']:>16.0f}"
+              f"{result['heap_mb']:>13.1f}{result['seconds']:>14.1f}")
+    if psutil is None:
+        print("\n(для измерения памяти Chrome установите psutil)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Пул заранее запущенных экземпляров WebDriver
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+from selenium.common.exceptions import WebDriverException
+
+
+class BrowserPool:
+    """
+    Пул браузеров для Selenium-парсеров.
+
+    Браузеры создаются по мере необходимости (не больше size) и после
+    использования возвращаются в пул, поэтому запуск Chrome оплачивается
+    один раз на несколько каналов. Браузер перезапускается после max_pages
+    страниц или когда куча JS вкладки превышает max_heap_mb.
+    """
+
+    def __init__(self, factory: Callable[[], object], size: int = 2, max_pages: int = 20,
+                 max_heap_mb: int = 512):
+        """
+        Args:
+            factory: Функция, создающая новый WebDriver
+            size: Максимальное число одновременно запущенных браузеров
+            max_pages: Сколько страниц обработать одним браузером до перезапуска
+            max_heap_mb: Порог используемой кучи JS (МБ) для перезапуска
+        """
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self._idle: "queue.Queue" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pages: Dict[int, int] = {}
+        self._all: List[object] = []
+        self._lock = threading.Lock()
+        self.started = 0
+        self.recycled = 0
+
+    def _heap_mb(self, driver) -> float:
+        """Используемая куча JS вкладки в МБ (performance.memory есть только в Chrome)"""
+        try:
+            used = driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null;"
+            )
+        except WebDriverException:
+            return 0.0
+        return (used or 0) / (1024 * 1024)
+
+    def _quit(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def acquire(self):
+        """Берет свободный браузер из пула или запускает новый; ждет, если заняты все size"""
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            driver = self.factory()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self._all.append(driver)
+            self.started += 1
+        return driver
+
+    def release(self, driver, healthy: bool = True):
+        """
+        Возвращает браузер в пул.
+
+        Args:
+            healthy: False, если при работе с браузером произошла ошибка -
+                     такой браузер закрывается
+        """
+        try:
+            with self._lock:
+                pages = self._pages.get(id(driver), 0) + 1
+                self._pages[id(driver)] = pages
+            if not healthy or pages >= self.max_pages or self._heap_mb(driver) > self.max_heap_mb:
+                self._quit(driver)
+                with self._lock:
+                    self.recycled += 1
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self) -> Iterator[object]:
+        """Браузер на время блока with"""
+        driver = self.acquire()
+        healthy = False
+        try:
+            yield driver
+            healthy = True
+        finally:
+            self.release(driver, healthy)
+
+    def close(self):
+        """Закрывает все браузеры пула"""
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            drivers = list(self._all)
+        for driver in drivers:
+            self._quit(driver)
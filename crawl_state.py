@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# Состояние инкрементального обхода: что уже видели в каждом источнике
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+
+class CrawlState:
+    """
+    Отметки уровня (high-water marks) по источникам: RSS-лентам, рубрикам
+    РБК и Telegram-каналам.
+
+    Для каждого источника хранятся последние увиденные URL, время самой
+    свежей записи и (для Telegram) ID самого нового поста. Парсеры
+    прекращают обход, как только доходят до уже известного содержимого.
+
+    is_known() и last_id() отвечают по состоянию на начало запуска, поэтому
+    несколько потребителей одного источника в одном запуске видят одно и то же.
+    Изменения накапливаются в памяти; save() вызывается после того, как
+    найденные записи сохранены в БД, чтобы сбой посреди цикла не терял новости.
+    """
+
+    # Сколько последних URL помнить для каждого источника
+    MAX_KNOWN_URLS = 200
+
+    def __init__(self, path: str = 'cache/crawl_state.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict] = self._load()
+        # Снимок на начало запуска
+        self._known: Dict[str, set] = {
+            source: set(entry.get('urls', [])) for source, entry in self._sources.items()
+        }
+        self._last_ids: Dict[str, Optional[int]] = {
+            source: entry.get('last_id') for source, entry in self._sources.items()
+        }
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Атомарно сохраняет состояние на диск"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._sources, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def is_known(self, source: str, url: str) -> bool:
+        """Встречался ли URL в источнике в прошлых запусках"""
+        return url in self._known.get(source, ())
+
+    def last_id(self, source: str) -> Optional[int]:
+        """ID самого нового обработанного поста (для Telegram)"""
+        return self._last_ids.get(source)
+
+    def remember(self, source: str, urls: Iterable[str] = (), newest: Optional[datetime] = None,
+                 last_id: Optional[int] = None):
+        """
+        Отмечает содержимое источника как увиденное.
+
+        Args:
+            source: Ключ источника, например 'rss:<url>' или 'telegram:<канал>'
+            urls: Новые URL, от новых к старым
+            newest: Время самой свежей записи
+            last_id: ID самого нового поста
+        """
+        with self._lock:
+            entry = self._sources.setdefault(source, {'urls': []})
+
+            listed = set(entry['urls'])
+            fresh = [url for url in urls if url not in listed]
+            if fresh:
+                entry['urls'] = (fresh + entry['urls'])[:self.MAX_KNOWN_URLS]
+
+            if newest is not None:
+                if entry.get('newest') is None or newest > datetime.fromisoformat(entry['newest']):
+                    entry['newest'] = newest.isoformat()
+
+            if last_id is not None and last_id > (entry.get('last_id') or 0):
+                entry['last_id'] = last_id
@@ -1,58 +1,879 @@
+import itertools
+import os
+import re
 import sqlite3
+import threading
 from datetime import datetime
+from date_utils import parse_date
+from russian_stemmer import stem_text, stem_words
+from news_archive import NewsArchive
+from minhash import BANDS, MIN_SIMILARITY, bands, features, similarity
+
+# Виды источников: вид -> подстрока в названии источника
+SOURCE_KINDS = {'rbc': 'РБК', 'telegram': 'Telegram'}
+
+
+def _epoch(text):
+    """Время публикации в секундах Unix или None"""
+    dt = parse_date(text) if text else None
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def _migrate_published_at(conn):
+    """Время публикации числом (с временем суток) и индексы под запросы API"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(news)')]
+    if 'published_at' not in columns:
+        conn.execute('ALTER TABLE news ADD COLUMN published_at INTEGER')
+    conn.create_function('epoch', 1, _epoch, deterministic=True)
+    conn.execute('UPDATE news SET published_at = epoch(date) WHERE published_at IS NULL')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_news_published ON news(published_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_news_category_published ON news(category, published_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_news_source_published ON news(source, published_at)')
+
+
+def _migrate_daily_stats(conn):
+    """Материализованные счетчики новостей по дням, источникам и категориям"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS news_daily_stats (
+            day TEXT NOT NULL,
+            source TEXT NOT NULL,
+            category TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, source, category)
+        ) WITHOUT ROWID
+    ''')
+    # Счетчики обновляются триггерами при любой записи в news
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_stats_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_daily_stats (day, source, category, count)
+            VALUES (substr(NEW.date, 1, 10), NEW.source, coalesce(NEW.category, 'general'), 1)
+            ON CONFLICT (day, source, category) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_stats_delete AFTER DELETE ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = substr(OLD.date, 1, 10) AND source = OLD.source
+              AND category = coalesce(OLD.category, 'general');
+            DELETE FROM news_daily_stats WHERE count <= 0;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_stats_update AFTER UPDATE OF date, source, category ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = substr(OLD.date, 1, 10) AND source = OLD.source
+              AND category = coalesce(OLD.category, 'general');
+            DELETE FROM news_daily_stats WHERE count <= 0;
+            INSERT INTO news_daily_stats (day, source, category, count)
+            VALUES (substr(NEW.date, 1, 10), NEW.source, coalesce(NEW.category, 'general'), 1)
+            ON CONFLICT (day, source, category) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('DELETE FROM news_daily_stats')
+    conn.execute('''
+        INSERT INTO news_daily_stats (day, source, category, count)
+        SELECT substr(date, 1, 10), source, coalesce(category, 'general'), COUNT(*)
+        FROM news GROUP BY 1, 2, 3
+    ''')
+
+
+def _create_fts_triggers(conn):
+    """Триггеры, поддерживающие news_fts в соответствии с news"""
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_fts (rowid, title, content)
+            VALUES (NEW.id, stem_ru(NEW.title), stem_ru(NEW.content));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+            DELETE FROM news_fts WHERE rowid = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, content ON news BEGIN
+            UPDATE news_fts SET title = stem_ru(NEW.title), content = stem_ru(NEW.content)
+            WHERE rowid = NEW.id;
+        END
+    ''')
+
+
+def _migrate_fts(conn):
+    """Полнотекстовый индекс FTS5 по основам слов заголовка и текста"""
+    # Основы слов считает Python-функция stem_ru (регистрируется на каждом соединении)
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, content, tokenize = 'unicode61 remove_diacritics 0'
+        )
+    ''')
+    _create_fts_triggers(conn)
+    # Ранжирование по умолчанию (ORDER BY rank): совпадения в заголовке весят втрое больше
+    conn.execute("INSERT INTO news_fts (news_fts, rank) VALUES ('rank', 'bm25(3.0, 1.0)')")
+    conn.execute('DELETE FROM news_fts')
+    conn.execute('''
+        INSERT INTO news_fts (rowid, title, content)
+        SELECT id, stem_ru(title), stem_ru(content) FROM news
+    ''')
+
+
+# Новости одного события публикуются в пределах нескольких дней: кандидаты
+# в сюжет старше или новее записи на STORY_WINDOW секунд не рассматриваются
+STORY_WINDOW = 3 * 24 * 3600
+
+# Сколько кандидатов в сюжет сравнивать с записью
+STORY_CANDIDATES = 20
+
+
+def _cluster_stories(conn):
+    """
+    Относит новые записи (story_id IS NULL) к сюжетам.
+
+    Кандидаты ищутся в news_story_bands по совпадающим полосам MinHash-подписи
+    заголовка, поэтому запись сравнивается только с несколькими похожими, а не
+    со всей таблицей. Запись попадает в сюжет самого похожего кандидата, если
+    мера Жаккара признаков больше MIN_SIMILARITY, иначе начинает свой сюжет
+    (story_id = id).
+    """
+    lookup = ' UNION ALL '.join([
+        'SELECT * FROM (SELECT news_id FROM news_story_bands WHERE band = ? AND value = ? '
+        'ORDER BY news_id DESC LIMIT ?)'
+    ] * BANDS)
+    rows = conn.execute('SELECT id, title, published_at FROM news WHERE story_id IS NULL ORDER BY id').fetchall()
+    for news_id, title, published_at in rows:
+        feature_set = features(title)
+        story_id = news_id
+        if feature_set is not None:
+            values = list(enumerate(bands(feature_set)))
+            # С каждой полосы - последние STORY_CANDIDATES записей (частые значения полос
+            # не заставляют перебирать всю таблицу); из них проверяются записи
+            # с наибольшим числом совпавших полос - у них выше ожидаемое сходство
+            candidates = conn.execute(f'''
+                SELECT news.title, news.story_id FROM ({lookup}) AS matched
+                JOIN news ON news.id = matched.news_id
+                WHERE ? IS NULL OR news.published_at IS NULL OR abs(news.published_at - ?) <= ?
+                GROUP BY news.id
+                ORDER BY COUNT(*) DESC, news.id DESC
+                LIMIT ?
+            ''', [item for pair in values for item in pair + (STORY_CANDIDATES,)]
+                + [published_at, published_at, STORY_WINDOW, STORY_CANDIDATES]).fetchall()
+            best = max(((similarity(feature_set, features(other) or frozenset()), other_story)
+                        for other, other_story in candidates), default=None)
+            if best is not None and best[0] > MIN_SIMILARITY:
+                story_id = best[1]
+            conn.executemany('INSERT OR IGNORE INTO news_story_bands (band, value, news_id) VALUES (?, ?, ?)',
+                             [(band, value, news_id) for band, value in values])
+        conn.execute('UPDATE news SET story_id = ? WHERE id = ?', (story_id, news_id))
+
+
+def _create_story_index(conn):
+    """LSH-индекс полос подписей (news_story_bands) и триггеры сюжетов при удалении записей"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS news_story_bands (
+            band INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            news_id INTEGER NOT NULL,
+            PRIMARY KEY (band, value, news_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_story_bands_news ON news_story_bands(news_id)')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_story_bands_delete AFTER DELETE ON news BEGIN
+            DELETE FROM news_story_bands WHERE news_id = OLD.id;
+        END
+    ''')
+    # При удалении первой записи сюжета его представителем становится следующая
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS news_story_delete AFTER DELETE ON news
+        WHEN OLD.story_id = OLD.id BEGIN
+            UPDATE news SET story_id = (SELECT MIN(id) FROM news WHERE story_id = OLD.id)
+            WHERE story_id = OLD.id;
+        END
+    ''')
+
+
+def _migrate_stories(conn):
+    """Сюжет (story_id) и LSH-индекс полос подписей заголовков"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(news)')]
+    if 'story_id' not in columns:
+        conn.execute('ALTER TABLE news ADD COLUMN story_id INTEGER')
+    # Частичный индекс содержит только еще не распределенные по сюжетам записи
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_news_unclustered ON news(id) WHERE story_id IS NULL')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_news_story ON news(story_id)')
+    _create_story_index(conn)
+    conn.execute('DELETE FROM news_story_bands')
+    conn.execute('UPDATE news SET story_id = NULL')
+    _cluster_stories(conn)
+
+
+def _source_metadata(name):
+    """Вид источника (из SOURCE_KINDS, иначе 'other') и канал Telegram по названию"""
+    kind = next((kind for kind, marker in SOURCE_KINDS.items() if marker in name), 'other')
+    channel = re.search(r'@(\w+)', name) if kind == 'telegram' else None
+    return kind, channel.group(1) if channel else None
+
+
+def _register_names(conn, sources, categories):
+    """Добавляет в справочники новые источники и категории"""
+    conn.executemany('INSERT OR IGNORE INTO sources (name, kind, channel) VALUES (?, ?, ?)',
+                     [(name,) + _source_metadata(name) for name in set(sources)])
+    conn.executemany('INSERT OR IGNORE INTO categories (name) VALUES (?)',
+                     [(name,) for name in set(categories)])
+
+
+def _migrate_lookup_tables(conn):
+    """
+    Справочники источников и категорий: news хранит их id вместо строк.
+
+    SQLite не умеет менять тип столбца, поэтому news перестраивается:
+    данные копируются в новую таблицу (с теми же id), а индексы, триггеры
+    и счетчики создаются заново.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sources (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            kind TEXT NOT NULL,
+            channel TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    _register_names(
+        conn,
+        [row[0] for row in conn.execute('SELECT DISTINCT source FROM news')],
+        [row[0] for row in conn.execute("SELECT DISTINCT coalesce(category, 'general') FROM news")],
+    )
+
+    triggers = conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'news'").fetchall()
+    for (name,) in triggers:
+        conn.execute(f'DROP TRIGGER {name}')
+    conn.execute('''
+        CREATE TABLE news_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT,
+            date TEXT NOT NULL,
+            source_id INTEGER NOT NULL REFERENCES sources(id),
+            url TEXT UNIQUE NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories(id),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            published_at INTEGER,
+            story_id INTEGER
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO news_new (id, title, content, date, source_id, url, category_id,
+                              created_at, published_at, story_id)
+        SELECT news.id, title, content, date, sources.id, url, categories.id,
+               created_at, published_at, story_id
+        FROM news
+        JOIN sources ON sources.name = news.source
+        JOIN categories ON categories.name = coalesce(news.category, 'general')
+    ''')
+    # Счетчик AUTOINCREMENT сохраняется: id архивированных записей не выдаются повторно
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'news'").fetchone()
+    conn.execute('DROP TABLE news')
+    conn.execute('ALTER TABLE news_new RENAME TO news')
+    if sequence:
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'news'", sequence)
+
+    conn.execute('CREATE INDEX idx_news_published ON news(published_at)')
+    conn.execute('CREATE INDEX idx_news_category_published ON news(category_id, published_at)')
+    conn.execute('CREATE INDEX idx_news_source_published ON news(source_id, published_at)')
+    conn.execute('CREATE INDEX idx_news_unclustered ON news(id) WHERE story_id IS NULL')
+    conn.execute('CREATE INDEX idx_news_story ON news(story_id)')
+
+    conn.execute('DROP TABLE news_daily_stats')
+    conn.execute('''
+        CREATE TABLE news_daily_stats (
+            day TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, source_id, category_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TRIGGER news_stats_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_daily_stats (day, source_id, category_id, count)
+            VALUES (substr(NEW.date, 1, 10), NEW.source_id, NEW.category_id, 1)
+            ON CONFLICT (day, source_id, category_id) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER news_stats_delete AFTER DELETE ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = substr(OLD.date, 1, 10) AND source_id = OLD.source_id AND category_id = OLD.category_id;
+            DELETE FROM news_daily_stats WHERE count <= 0;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER news_stats_update AFTER UPDATE OF date, source_id, category_id ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = substr(OLD.date, 1, 10) AND source_id = OLD.source_id AND category_id = OLD.category_id;
+            DELETE FROM news_daily_stats WHERE count <= 0;
+            INSERT INTO news_daily_stats (day, source_id, category_id, count)
+            VALUES (substr(NEW.date, 1, 10), NEW.source_id, NEW.category_id, 1)
+            ON CONFLICT (day, source_id, category_id) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('''
+        INSERT INTO news_daily_stats (day, source_id, category_id, count)
+        SELECT substr(date, 1, 10), source_id, category_id, COUNT(*)
+        FROM news GROUP BY 1, 2, 3
+    ''')
+    _create_fts_triggers(conn)
+    _create_story_index(conn)
+
+    # Новости с названиями источника и категории - для чтения
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS news_named AS
+        SELECT news.id, news.title, news.content, news.date, sources.name AS source, news.url,
+               categories.name AS category, news.published_at, news.story_id,
+               news.source_id, news.category_id
+        FROM news
+        JOIN sources ON sources.id = news.source_id
+        JOIN categories ON categories.id = news.category_id
+    ''')
+
+
+# День публикации для news_daily_stats по published_at; '' - время неизвестно
+_STATS_DAY = "coalesce(date({row}.published_at, 'unixepoch', 'localtime'), '')"
+
+
+def _migrate_stats_by_published(conn):
+    """Счетчики по дню из published_at: даты в старых форматах ('13.11.2025') не дают своих дней"""
+    for name in ('news_stats_insert', 'news_stats_delete', 'news_stats_update'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    conn.execute(f'''
+        CREATE TRIGGER news_stats_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_daily_stats (day, source_id, category_id, count)
+            VALUES ({_STATS_DAY.format(row='NEW')}, NEW.source_id, NEW.category_id, 1)
+            ON CONFLICT (day, source_id, category_id) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER news_stats_delete AFTER DELETE ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = {_STATS_DAY.format(row='OLD')}
+              AND source_id = OLD.source_id AND category_id = OLD.category_id;
+            DELETE FROM news_daily_stats WHERE count <= 0;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER news_stats_update AFTER UPDATE OF published_at, source_id, category_id ON news BEGIN
+            UPDATE news_daily_stats SET count = count - 1
+            WHERE day = {_STATS_DAY.format(row='OLD')}
+              AND source_id = OLD.source_id AND category_id = OLD.category_id;
+            DELETE FROM news_daily_stats WHERE count <= 0;
+            INSERT INTO news_daily_stats (day, source_id, category_id, count)
+            VALUES ({_STATS_DAY.format(row='NEW')}, NEW.source_id, NEW.category_id, 1)
+            ON CONFLICT (day, source_id, category_id) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('DELETE FROM news_daily_stats')
+    conn.execute(f'''
+        INSERT INTO news_daily_stats (day, source_id, category_id, count)
+        SELECT {_STATS_DAY.format(row='news')}, source_id, category_id, COUNT(*)
+        FROM news GROUP BY 1, 2, 3
+    ''')
+
+
+def _migrate_minhash_stories(conn):
+    """
+    Сюжеты по MinHash-подписям заголовков вместо SimHash.
+
+    SimHash с порогом 3 бита объединял только заголовки, совпадающие после
+    стемминга; прежние полосы, отпечатки и сюжеты пересчитываются заново.
+    """
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_simhash_bands'").fetchone()
+    if legacy is None:
+        # База создана уже с MinHash (миграция 4)
+        return
+    conn.execute('DROP TRIGGER IF EXISTS news_simhash_delete')
+    conn.execute('DROP TABLE news_simhash_bands')
+    if 'simhash' in [row[1] for row in conn.execute('PRAGMA table_info(news)')]:
+        conn.execute('ALTER TABLE news DROP COLUMN simhash')
+    _create_story_index(conn)
+    conn.execute('DELETE FROM news_story_bands')
+    conn.execute('UPDATE news SET story_id = NULL')
+    _cluster_stories(conn)
+
+def _newest_in_story(filters, table='news_named'):
+    """
+    Условие dedupe: в сюжете записи нет более новой записи, проходящей те же
+    фильтры. Представитель выбирается внутри отфильтрованного набора, поэтому
+    фильтр по источнику или категории не теряет сюжеты, начатые другим источником.
+
+    Args:
+        filters: Условия фильтров с {t} вместо префикса таблицы
+    """
+    extra = ''.join(' AND ' + condition.format(t='newer.') for condition in filters)
+    return f'''NOT EXISTS (
+        SELECT 1 FROM news AS newer
+        WHERE newer.story_id = {table}.story_id
+          AND (coalesce(newer.published_at, 0), newer.id) > (coalesce({table}.published_at, 0), {table}.id){extra}
+    )'''
+
 
 class NewsDB:
-    def __init__(self, db_path='news.db'):
+    # Настройки каждого соединения. WAL позволяет читать (Flask) во время
+    # записи (импорт); synchronous=NORMAL в режиме WAL не теряет целостность
+    PRAGMAS = (
+        # Действует только для новой базы и должна идти до WAL; свободные
+        # страницы возвращает retention.RetentionPolicy.vacuum
+        'PRAGMA auto_vacuum=INCREMENTAL',
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-16000',     # ~16 МБ страничного кэша
+        'PRAGMA mmap_size=268435456',   # до 256 МБ файла читается через mmap
+        'PRAGMA temp_store=MEMORY',
+    )
+    
+    # Поля, которые можно запросить у get_news / get_top_per_source
+    COLUMNS = ('id', 'title', 'content', 'date', 'source', 'url', 'category', 'published_at', 'story_id')
+    DEFAULT_COLUMNS = ('title', 'content', 'date', 'source', 'url', 'category')
+    
+    # Виды источников для get_top_per_source (sources.kind)
+    SOURCE_KINDS = tuple(SOURCE_KINDS)
+    
+    # Миграции схемы по порядку; номер последней примененной хранится в PRAGMA user_version
+    MIGRATIONS = (
+        _migrate_published_at,
+        _migrate_daily_stats,
+        _migrate_fts,
+        _migrate_stories,
+        _migrate_lookup_tables,
+        _migrate_stats_by_published,
+        _migrate_minhash_stories,
+    )
+    
+    # Ожидание блокировки записи, секунд: обычное и при миграции схемы
+    TIMEOUT = 10
+    MIGRATION_TIMEOUT = 600
+    
+    def __init__(self, db_path='news.db', archive_dir=None):
+        """
+        Args:
+            db_path: Файл базы
+            archive_dir: Каталог архива старых новостей (по умолчанию archive рядом с базой)
+        """
         self.db_path = db_path
+        self.archive = NewsArchive(archive_dir or os.path.join(os.path.dirname(db_path), 'archive'))
+        self._local = threading.local()
+        # [поток-владелец, соединение]
+        self._connections = []
+        self._lock = threading.Lock()
         self.init_db()
     
+    def _open(self):
+        # cached_statements: подготовленные запросы переиспользуются по тексту SQL
+        conn = sqlite3.connect(self.db_path, timeout=self.TIMEOUT, cached_statements=256, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function('stem_ru', 1, stem_text, deterministic=True)
+        return conn
+    
+    def _connect(self):
+        """Долгоживущее соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        current = threading.current_thread()
+        with self._lock:
+            # Сервер Flask создает поток на каждый запрос: соединения
+            # завершившихся потоков передаются новым, а не открываются заново
+            for entry in self._connections:
+                if not entry[0].is_alive():
+                    entry[0] = current
+                    conn = entry[1]
+                    break
+            else:
+                conn = self._open()
+                self._connections.append([current, conn])
+        self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Закрывает все соединения"""
+        with self._lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+    
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS news (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT,
-                date TEXT NOT NULL,
-                source TEXT NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                category TEXT DEFAULT 'general',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-        conn.close()
-    
-    def add_news(self, title, content, date, source, url, category='general'):
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS news (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    content TEXT,
+                    date TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    url TEXT UNIQUE NOT NULL,
+                    category TEXT DEFAULT 'general',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        self._migrate(conn)
+    
+    def _migrate(self, conn):
+        """
+        Обновляет схему существующей базы на месте.
+        
+        Версия перечитывается после захвата блокировки записи: если базу
+        одновременно открыли несколько процессов (app.py во время импорта),
+        каждую миграцию выполняет только один из них. Остальные ждут ее
+        окончания до MIGRATION_TIMEOUT секунд: миграции большой базы идут дольше
+        обычного timeout соединения.
+        """
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= len(self.MIGRATIONS):
+            return
+        conn.execute(f'PRAGMA busy_timeout = {self.MIGRATION_TIMEOUT * 1000}')
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO news (title, content, date, source, url, category)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (title, content, date, source, url, category))
-            conn.commit()
-            conn.close()
+            while conn.execute('PRAGMA user_version').fetchone()[0] < len(self.MIGRATIONS):
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    version = conn.execute('PRAGMA user_version').fetchone()[0]
+                    if version < len(self.MIGRATIONS):
+                        self.MIGRATIONS[version](conn)
+                        conn.execute(f'PRAGMA user_version = {version + 1}')
+        finally:
+            conn.execute(f'PRAGMA busy_timeout = {self.TIMEOUT * 1000}')
+    
+    # Источник и категория передаются названиями и заменяются на id из справочников
+    _INSERT = '''
+        INSERT OR IGNORE INTO news (title, content, date, source_id, url, category_id, published_at)
+        VALUES (?, ?, ?, (SELECT id FROM sources WHERE name = ?), ?,
+                (SELECT id FROM categories WHERE name = ?), ?)
+    '''
+    
+    def add_news(self, title, content, date, source, url, category='general', published=None):
+        try:
+            conn = self._connect()
+            category = category or 'general'
+            with conn:
+                _register_names(conn, [source], [category])
+                conn.execute(self._INSERT, (title, content, date, source, url, category,
+                                            _epoch(published) or _epoch(date)))
+                _cluster_stories(conn)
             return True
         except Exception as e:
             print(f"Error adding news: {e}")
             return False
     
+    def add_news_bulk(self, records, chunk_size=500):
+        """
+        Пакетная вставка новостей: executemany, одна транзакция на chunk_size записей.
+        Добавленные записи в той же транзакции относятся к сюжетам (story_id).
+        
+        Args:
+            records: Итерируемые словари с ключами title, content, date, source, url
+                     и необязательными category и published (ISO-время публикации;
+                     без него время берется из date)
+        
+        Returns:
+            (inserted, duplicates): сколько записей добавлено и сколько пропущено
+            как уже существующие (по url)
+        """
+        conn = self._connect()
+        rows = (
+            (r['title'], r.get('content'), r['date'], r['source'], r['url'], r.get('category') or 'general',
+             _epoch(r.get('published')) or _epoch(r['date']))
+            for r in records
+        )
+        inserted = duplicates = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            with conn:
+                _register_names(conn, [row[3] for row in chunk], [row[5] for row in chunk])
+                # rowcount суммирует вставки executemany без изменений, сделанных триггерами
+                added = conn.executemany(self._INSERT, chunk).rowcount
+                _cluster_stories(conn)
+            inserted += added
+            duplicates += len(chunk) - added
+        return inserted, duplicates
+    
     def get_all_news(self, category=None):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         if category:
-            cursor.execute('SELECT title, content, date, source, url, category FROM news WHERE category = ? ORDER BY date DESC', (category,))
+            rows = conn.execute('SELECT title, content, date, source, url, category FROM news_named WHERE category_id = (SELECT id FROM categories WHERE name = ?) ORDER BY published_at DESC', (category,)).fetchall()
         else:
-            cursor.execute('SELECT title, content, date, source, url, category FROM news ORDER BY date DESC')
-        rows = cursor.fetchall()
-        conn.close()
+            rows = conn.execute('SELECT title, content, date, source, url, category FROM news_named ORDER BY published_at DESC').fetchall()
         return [{'title': r[0], 'content': r[1], 'date': r[2], 'source': r[3], 'url': r[4], 'category': r[5]} for r in rows]
     
+    def _columns(self, columns):
+        columns = tuple(columns or self.DEFAULT_COLUMNS)
+        unknown = set(columns) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+        return columns
+    
+    def get_news(self, limit=20, offset=0, category=None, source=None, before=None, columns=None,
+                 dedupe=False, include_archive=False):
+        """
+        Страница новостей от новых к старым; сортировка и LIMIT выполняются в SQL по индексу.
+        
+        Args:
+            limit: Размер страницы
+            offset: Смещение (для небольших номеров страниц)
+            category: Фильтр по категории
+            source: Фильтр по источнику
+            before: Курсор (published_at, id) последней записи предыдущей страницы;
+                    в отличие от offset не требует пропуска строк
+            columns: Возвращаемые поля (из COLUMNS)
+            dedupe: Одна запись на сюжет - самая свежая среди прошедших фильтры
+            include_archive: Продолжить страницу архивными новостями (NewsArchive),
+                             когда в news.db записи закончились
+        
+        Returns:
+            (records, cursor): записи с запрошенными полями и курсор следующей
+            страницы - (published_at, id) последней записи ((0, id) для новости
+            без даты публикации) или None
+        """
+        columns = self._columns(columns)
+        filters, filter_params = [], []
+        # Фильтры по названиям сравнивают id из справочника по индексам news
+        if category:
+            filters.append('{t}category_id = (SELECT id FROM categories WHERE name = ?)')
+            filter_params.append(category)
+        if source:
+            filters.append('{t}source_id = (SELECT id FROM sources WHERE name = ?)')
+            filter_params.append(source)
+        conditions = [condition.format(t='') for condition in filters]
+        params = list(filter_params)
+        if dedupe:
+            conditions.append(_newest_in_story(filters))
+            params.extend(filter_params)
+        
+        conn = self._connect()
+        
+        def where(condition):
+            return 'WHERE ' + ' AND '.join(conditions + [condition])
+        
+        def page(condition, condition_params, limit, offset):
+            return conn.execute(f'''
+                SELECT {', '.join(columns)}, published_at, id FROM news_named
+                {where(condition)}
+                ORDER BY published_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', params + condition_params + [limit, offset]).fetchall()
+        
+        def count(condition, condition_params):
+            return conn.execute(f'SELECT COUNT(*) FROM news_named {where(condition)}',
+                                params + condition_params).fetchone()[0]
+        
+        # Лента: новости с датой публикации (published_at, id), затем архив,
+        # затем новости без даты (по id). Их курсор - (0, id): row-value
+        # сравнение с NULL ложно, поэтому они выбираются отдельным условием.
+        # Каждая часть идет по индексу published_at.
+        undated, undated_params = 'published_at IS NULL', []
+        if before is not None and not before[0]:
+            undated, undated_params = 'published_at IS NULL AND id < ?', [before[1]]
+            records, rows = [], []
+        else:
+            dated, dated_params = 'published_at IS NOT NULL', []
+            if before is not None:
+                dated, dated_params = '(published_at, id) < (?, ?)', list(before)
+            rows = page(dated, dated_params, limit, offset)
+            records = [dict(zip(columns, row)) for row in rows]
+            if rows:
+                before, offset = (rows[-1][-2], rows[-1][-1]), 0
+            elif offset:
+                offset = max(offset - count(dated, dated_params), 0)
+            
+            if include_archive and len(records) < limit:
+                # Архив продолжает ленту после самой старой подходящей записи news.db
+                # (копии обрезанных записей в архиве новее ее и пропускаются); смещение,
+                # которое не покрыли записи news.db, переносится в архив
+                if not rows:
+                    oldest = conn.execute(f'''
+                        SELECT published_at, id FROM news_named {where(dated)}
+                        ORDER BY published_at, id LIMIT 1
+                    ''', params + dated_params).fetchone()
+                    before = tuple(oldest) if oldest else before
+                archived, archive_cursor = self.archive.get_news(
+                    limit - len(records), offset, category, source, before, columns, dedupe
+                )
+                if archived:
+                    records += archived
+                    before, offset = archive_cursor, 0
+                elif offset:
+                    offset = max(offset - self.archive.count(category, source, before, dedupe), 0)
+        
+        cursor = before if records else None
+        if len(records) < limit:
+            rows = page(undated, undated_params, limit - len(records), offset)
+            records += [dict(zip(columns, row)) for row in rows]
+            if rows:
+                cursor = (0, rows[-1][-1])
+        return records, cursor
+    
+    def get_top_per_source(self, per_source=5, category=None, columns=None, dedupe=False):
+        """
+        До per_source самых свежих новостей каждого вида источника (SOURCE_KINDS)
+        одним запросом.
+        
+        Каждая ветка UNION ALL идет по индексу (category_id, published_at) от новых
+        к старым, сравнивая source_id с id источников своего вида, и останавливается
+        на per_source записях, поэтому время ответа не зависит от размера таблицы
+        (ROW_NUMBER() OVER (PARTITION BY ...) перебирал бы всю категорию).
+        С dedupe - одна запись на сюжет в каждой ветке (самая свежая в ней).
+        
+        Returns:
+            List[Dict]: записи с запрошенными полями, от новых к старым
+        """
+        columns = self._columns(columns)
+        filters = ['{t}source_id IN (SELECT id FROM sources WHERE kind = ?)']
+        if category:
+            filters.insert(0, '{t}category_id = (SELECT id FROM categories WHERE name = ?)')
+        conditions = [condition.format(t='') for condition in filters]
+        if dedupe:
+            conditions.append(_newest_in_story(filters))
+        where = ' AND '.join(conditions)
+        selected = ', '.join(columns)
+        branches, params = [], []
+        for kind in self.SOURCE_KINDS:
+            branches.append(f'''
+                SELECT * FROM (
+                    SELECT {selected}, published_at, id FROM news_named
+                    WHERE {where}
+                    ORDER BY published_at DESC, id DESC
+                    LIMIT ?
+                )
+            ''')
+            branch_params = ([category] if category else []) + [kind]
+            params.extend(branch_params * (2 if dedupe else 1) + [per_source])
+        rows = self._connect().execute(
+            ' UNION ALL '.join(branches) + ' ORDER BY published_at DESC, id DESC', params
+        ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def search(self, query, limit=20, offset=0, category=None, columns=None):
+        """
+        Полнотекстовый поиск по заголовку и тексту с учетом словоформ.
+        
+        Слова запроса приводятся к основам тем же стеммером, что и при
+        индексации, и должны встретиться все; результаты ранжируются bm25
+        (совпадения в заголовке весят больше).
+        
+        Returns:
+            List[Dict]: записи с запрошенными полями, от наиболее релевантных
+        """
+        columns = self._columns(columns)
+        stems = list(dict.fromkeys(stem_words(query or '')))
+        if not stems:
+            return []
+        match = ' '.join(f'"{word}"' for word in stems)
+        selected = ', '.join('news.' + column for column in columns)
+        if category:
+            rows = self._connect().execute(f'''
+                SELECT {selected}
+                FROM news_fts JOIN news_named AS news ON news.id = news_fts.rowid
+                WHERE news_fts MATCH ? AND news.category_id = (SELECT id FROM categories WHERE name = ?)
+                ORDER BY news_fts.rank
+                LIMIT ? OFFSET ?
+            ''', (match, category, limit, offset)).fetchall()
+        else:
+            # Страница выбирается в самом индексе, с news соединяются только ее строки
+            rows = self._connect().execute(f'''
+                SELECT {selected}
+                FROM (
+                    SELECT rowid, rank FROM news_fts
+                    WHERE news_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ? OFFSET ?
+                ) AS hits JOIN news_named AS news ON news.id = hits.rowid
+                ORDER BY hits.rank
+            ''', (match, limit, offset)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def get_stats(self, days=None):
+        """
+        Количество новостей по таблице news_daily_stats, без чтения самих новостей.
+        
+        Args:
+            days: Сколько последних календарных дней (включая сегодня) вернуть
+                  в by_day (None - все)
+        
+        Returns:
+            Dict: {'total', 'by_category': {категория: N}, 'by_source': {источник: N},
+                   'by_day': [{'day', 'count'}, ...] от новых к старым}; новости
+                   без времени публикации входят только в total и разбивки
+        """
+        conn = self._connect()
+        by_category = dict(conn.execute('''
+            SELECT categories.name, SUM(count) FROM news_daily_stats
+            JOIN categories ON categories.id = news_daily_stats.category_id
+            GROUP BY category_id ORDER BY 2 DESC
+        ''').fetchall())
+        by_source = dict(conn.execute('''
+            SELECT sources.name, SUM(count) FROM news_daily_stats
+            JOIN sources ON sources.id = news_daily_stats.source_id
+            GROUP BY source_id ORDER BY 2 DESC
+        ''').fetchall())
+        # Пустой день ('') - новости без времени публикации - меньше любой даты
+        first_day = f"date('now', 'localtime', '-{int(days) - 1} days')" if days else "'0000-00-00'"
+        by_day = conn.execute(f'''
+            SELECT day, SUM(count) FROM news_daily_stats
+            WHERE day >= {first_day}
+            GROUP BY day ORDER BY day DESC
+        ''').fetchall()
+        return {
+            'total': sum(by_category.values()),
+            'by_category': by_category,
+            'by_source': by_source,
+            'by_day': [{'day': day, 'count': count} for day, count in by_day],
+        }
+    
+    def existing_urls(self, urls, with_content=False):
+        """
+        URL из списка, которые уже есть в базе
+        
+        Args:
+            with_content: Только новости с полным текстом (content не совпадает с заголовком)
+        """
+        content_filter = ' AND content IS NOT NULL AND content != title' if with_content else ''
+        urls = list(dict.fromkeys(urls))
+        found = set()
+        conn = self._connect()
+        # Не больше 500 параметров в одном запросе (лимит SQLite - 999)
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT url FROM news WHERE url IN ({placeholders}){content_filter}',
+                                chunk).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+    
+    def fill_content(self, records):
+        """
+        Дописывает полный текст новостям, сохраненным с заголовком вместо текста
+        (статья не загрузилась или текст не извлекся в прошлый раз).
+        
+        Args:
+            records: Словари с ключами url, title и content
+        
+        Returns:
+            int: Сколько новостей обновлено
+        """
+        rows = [(r['content'], r['url']) for r in records
+                if r.get('content') and r.get('url') and r['content'] != r.get('title')]
+        conn = self._connect()
+        with conn:
+            return conn.executemany(
+                'UPDATE news SET content = ? WHERE url = ? AND (content IS NULL OR content = title)', rows
+            ).rowcount
+    
     def clear_news(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM news')
-        conn.commit()
-        conn.close()
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM news')
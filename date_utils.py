@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Единый разбор дат из RSS, HTML и Telegram
+
+import re
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
+
+# Дата в адресе статьи РБК: /finances/13/11/2025/6734.../
+_URL_DATE = re.compile(r'/(\d{2})/(\d{2})/(\d{4})/')
+
+_DOTTED_FORMATS = ('%d.%m.%Y %H:%M', '%d.%m.%Y')
+
+
+def local_now() -> datetime:
+    """Текущее время с часовым поясом системы"""
+    return datetime.now().astimezone()
+
+
+def _localize(dt: datetime) -> datetime:
+    """Время без часового пояса считается локальным"""
+    return dt if dt.tzinfo is not None else dt.astimezone()
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> Optional[datetime]:
+    """
+    Разбирает дату в datetime с часовым поясом; None, если формат не распознан.
+
+    Определяет формат по первым символам и разбирает строку без перебора
+    форматов через исключения. Результаты кэшируются: одни и те же метки
+    времени повторяются в нескольких лентах и при повторных запусках.
+    """
+    text = text.strip()
+    if len(text) < 10:
+        return None
+
+    try:
+        if text[0].isdigit():
+            if text[4] == '-':
+                # ISO 8601: 2025-11-13T12:00:00+03:00, 2025-11-13 00:00:00, ...Z
+                if text.endswith('Z'):
+                    text = text[:-1] + '+00:00'
+                return _localize(datetime.fromisoformat(text))
+            if text[2] == '.' and text[5] == '.':
+                # 13.11.2025 или 13.11.2025 12:00
+                for fmt in _DOTTED_FORMATS:
+                    try:
+                        return _localize(datetime.strptime(text, fmt))
+                    except ValueError:
+                        continue
+                return None
+        # RFC 2822 (RSS): Wed, 13 Nov 2025 12:00:00 +0300 или 13 Nov 2025 ...
+        return _localize(parsedate_to_datetime(text))
+    except (TypeError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def date_from_url(url: Optional[str]) -> Optional[datetime]:
+    """Дата публикации из адреса статьи РБК (полночь по местному времени)"""
+    if not url:
+        return None
+    match = _URL_DATE.search(url)
+    if not match:
+        return None
+    day, month, year = match.groups()
+    return parse_date(f"{year}-{month}-{day}")
+
+
+class DateParser:
+    """
+    Разбор дат с подсчетом ошибок.
+
+    Вместо подстановки текущего времени возвращает None и увеличивает
+    счетчик failures, чтобы неразобранные даты не портили сортировку.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def parse(self, text: Optional[str], url: Optional[str] = None) -> Optional[datetime]:
+        """
+        Args:
+            text: Строка с датой (RSS pubDate, атрибут datetime, текст на странице)
+            url: Адрес статьи; если текст не разобран, дата берется из адреса
+
+        Returns:
+            datetime с часовым поясом или None
+        """
+        dt = parse_date(text) if text else None
+        if dt is None:
+            dt = date_from_url(url)
+        if dt is None:
+            with self._lock:
+                self.failures += 1
+        return dt
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Параллельная загрузка страниц с ограничением частоты запросов к каждому хосту
+
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+from urllib.parse import urlsplit
+from http_session import get_session
+from throttle import AdaptiveThrottle
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class TokenBucket:
+    """Token bucket: не более rate запросов в секунду со всплеском до capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        """Меняет частоту, не теряя уже накопленные токены"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate
+
+    def acquire(self):
+        """Блокирует поток, пока не появится свободный токен"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchEngine:
+    """
+    Пул потоков для загрузки страниц.
+
+    Вежливость по отношению к сайту обеспечивается не фиксированными паузами,
+    а token bucket и ограничением числа одновременных запросов на каждый хост.
+    Частоту каждого хоста подстраивает AdaptiveThrottle; к хостам с
+    разомкнутой цепью запросы не отправляются (CircuitOpenError).
+    """
+
+    # Ответы, после которых запрос повторяется
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, max_workers: int = 8, per_host_rate: float = 2.0,
+                 per_host_burst: float = 2.0, per_host_concurrency: int = 2,
+                 session: Optional[requests.Session] = None,
+                 throttle: Optional[AdaptiveThrottle] = None,
+                 retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 10.0):
+        """
+        Args:
+            max_workers: Общее число потоков загрузки
+            per_host_rate: Допустимая частота запросов к одному хосту (запросов/сек)
+            per_host_burst: Размер всплеска запросов к одному хосту
+            per_host_concurrency: Максимум одновременных запросов к одному хосту
+            session: HTTP-сессия с пулом соединений (по умолчанию общая сессия процесса,
+                     без собственных повторов)
+            throttle: Адаптивный ограничитель; per_host_rate - его начальная частота
+            retries: Число повторов при сетевых ошибках, таймаутах, 429 и 5xx
+            backoff_factor: Пауза перед n-м повтором - backoff_factor * 2**(n-1) сек
+            max_backoff: Максимальная пауза; при большем Retry-After запрос не повторяется
+        """
+        self.session = session or get_session()
+        self.throttle = throttle or AdaptiveThrottle(base_rate=per_host_rate)
+        self.max_workers = max_workers
+        self.per_host_rate = per_host_rate
+        self.per_host_burst = per_host_burst
+        self.per_host_concurrency = per_host_concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _host_limits(self, host: str):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.throttle.rate(host), self.per_host_burst)
+                self._slots[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._buckets[host], self._slots[host]
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After', '')
+        return float(value) if value.isdigit() else None
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET-запрос с учетом лимитов хоста и повторами.
+
+        Каждая попытка проходит проверку цепи и учитывается AdaptiveThrottle,
+        поэтому после серии ошибок повторы прекращаются CircuitOpenError,
+        а не продолжаются паузами. Таймаут не превышает переданный и
+        сокращается по наблюдаемому времени ответа хоста.
+
+        Raises:
+            CircuitOpenError: хост временно отключен из-за ошибок
+        """
+        host = urlsplit(url).netloc
+        bucket, slot = self._host_limits(host)
+        max_timeout = kwargs.pop('timeout', self.throttle.max_timeout)
+
+        for attempt in range(self.retries + 1):
+            self.throttle.before_request(host)
+            timeout = min(max_timeout, self.throttle.timeout(host))
+            response = error = retry_after = None
+            with slot:
+                bucket.acquire()
+                start = time.monotonic()
+                try:
+                    response = self.session.get(url, timeout=timeout, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    error = e
+                    self.throttle.record(host, time.monotonic() - start)
+                except requests.exceptions.RequestException:
+                    self.throttle.record(host, time.monotonic() - start)
+                    bucket.set_rate(self.throttle.rate(host))
+                    raise
+                else:
+                    retry_after = self._retry_after(response)
+                    self.throttle.record(host, time.monotonic() - start, response.status_code,
+                                         retry_after)
+            bucket.set_rate(self.throttle.rate(host))
+
+            if response is not None and response.status_code not in self.RETRY_STATUSES:
+                return response
+            delay = self.backoff_factor * 2 ** attempt
+            if retry_after:
+                delay = retry_after
+            if attempt == self.retries or delay > self.max_backoff:
+                if response is not None:
+                    return response
+                raise error
+            time.sleep(delay)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Выполняет fn для каждого элемента в пуле потоков, сохраняя порядок результатов"""
+        return list(self._executor.map(fn, items))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# Дисковый HTTP-кэш с условными запросами (ETag / Last-Modified)
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from fetch_engine import FetchEngine
+
+
+class CachedResponse:
+    """Результат запроса через HTTPCache"""
+
+    def __init__(self, status_code: int, data: Any = None, from_cache: bool = False):
+        self.status_code = status_code
+        self.data = data
+        # True, если данные взяты из кэша (304 или тело не изменилось)
+        self.from_cache = from_cache
+
+
+# Размер блока при потоковом чтении ответа
+CHUNK_SIZE = 16 * 1024
+
+
+class HTTPCache:
+    """
+    Хранит на диске валидаторы (ETag, Last-Modified), отпечаток тела ответа
+    и уже разобранные данные для каждого URL.
+
+    При повторном запросе отправляет If-None-Match / If-Modified-Since.
+    Если сервер ответил 304 или тело совпало с предыдущим, функция разбора
+    не вызывается и возвращаются данные из кэша.
+    """
+
+    def __init__(self, path: str = 'cache/http_cache.json', engine: Optional[FetchEngine] = None):
+        """
+        Args:
+            path: Файл кэша
+            engine: Движок загрузки (лимиты частоты запросов к хостам)
+        """
+        self.path = path
+        self.engine = engine or FetchEngine()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Атомарно сохраняет кэш на диск"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def fingerprint(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()
+
+    def _conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def fetch(self, url: str, parse: Callable[[bytes], Any], headers: Optional[Dict] = None,
+              key: Optional[str] = None, timeout: int = 10) -> CachedResponse:
+        """
+        Загружает URL и возвращает разобранные данные.
+
+        Args:
+            url: Адрес ресурса
+            parse: Функция разбора тела ответа; результат должен сериализоваться в JSON
+            headers: Дополнительные заголовки запроса
+            key: Ключ кэша (по умолчанию URL); разные парсеры одной страницы
+                 используют разные ключи, так как хранят разные данные
+            timeout: Таймаут запроса в секундах
+
+        Raises:
+            requests.exceptions.RequestException: ошибки сети
+        """
+        key = key or url
+        with self._lock:
+            entry = self._entries.get(key)
+
+        request_headers = dict(headers or {})
+        request_headers.update(self._conditional_headers(entry))
+
+        response = self.engine.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self.hits += 1
+            return CachedResponse(304, entry['data'], from_cache=True)
+
+        if response.status_code != 200:
+            return CachedResponse(response.status_code)
+
+        body = response.content
+        fingerprint = self.fingerprint(body)
+
+        unchanged = entry is not None and entry.get('sha1') == fingerprint
+        if unchanged:
+            # Тело не изменилось - разбор не нужен, обновляем только валидаторы
+            self.hits += 1
+            data = entry['data']
+        else:
+            self.misses += 1
+            data = parse(body)
+
+        with self._lock:
+            self._entries[key] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha1': fingerprint,
+                'data': data,
+            }
+        self.save()
+
+        return CachedResponse(200, data, from_cache=unchanged)
+
+    def fetch_stream(self, url: str, parse_stream: Callable[[Iterable[bytes]], Any],
+                     key: Optional[str] = None, since: Optional[datetime] = None,
+                     timeout: int = 10) -> CachedResponse:
+        """
+        Загружает URL потоково: parse_stream получает блоки тела по мере
+        поступления и может прекратить чтение раньше конца документа.
+
+        В кэше хранится отпечаток только прочитанной части тела. Если при
+        следующем запросе эта часть не изменилась, разбор не выполняется.
+
+        Args:
+            url: Адрес ресурса
+            parse_stream: Функция разбора потока блоков; результат должен сериализоваться в JSON
+            key: Ключ кэша (по умолчанию URL)
+            since: Граница по дате, с которой разбиралось тело. Данные из кэша
+                   используются, только если они разбирались с той же или более
+                   ранней границей.
+            timeout: Таймаут запроса в секундах
+        """
+        key = key or url
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry.get('since') is not None:
+            cached_since = datetime.fromisoformat(entry['since'])
+            if since is not None and (cached_since.tzinfo is None) != (since.tzinfo is None):
+                cached_since = cached_since.astimezone()
+                since = since.astimezone()
+            if since is None or cached_since > since:
+                # Закэшированная часть тела короче, чем нужно сейчас
+                entry = None
+
+        response = self.engine.get(url, headers=self._conditional_headers(entry),
+                                   timeout=timeout, stream=True)
+        try:
+            if response.status_code == 304 and entry is not None:
+                self.hits += 1
+                return CachedResponse(304, entry['data'], from_cache=True)
+
+            if response.status_code != 200:
+                return CachedResponse(response.status_code)
+
+            chunks: Iterator[bytes] = response.iter_content(chunk_size=CHUNK_SIZE)
+            replay = []
+
+            if entry is not None and entry.get('length'):
+                # Сравниваем ту же часть тела, что была прочитана в прошлый раз
+                prefix = b''
+                for chunk in chunks:
+                    prefix += chunk
+                    if len(prefix) >= entry['length']:
+                        break
+                if self.fingerprint(prefix[:entry['length']]) == entry['sha1']:
+                    self.hits += 1
+                    return CachedResponse(200, entry['data'], from_cache=True)
+                replay.append(prefix)
+
+            digest = hashlib.sha1()
+            consumed = 0
+
+            def tracked_chunks():
+                nonlocal consumed
+                for chunk in itertools.chain(replay, chunks):
+                    digest.update(chunk)
+                    consumed += len(chunk)
+                    yield chunk
+
+            self.misses += 1
+            data = parse_stream(tracked_chunks())
+
+            with self._lock:
+                self._entries[key] = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'sha1': digest.hexdigest(),
+                    'length': consumed,
+                    'since': since.isoformat() if since else None,
+                    'data': data,
+                }
+            self.save()
+
+            return CachedResponse(200, data)
+        finally:
+            # Если разбор остановился раньше конца, недочитанное соединение закрывается
+            response.close()
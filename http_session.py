@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Общая HTTP-сессия с пулом соединений для всех источников РБК
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa: F401  urllib3 распаковывает br только при наличии brotli
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+
+
+def create_session(pool_connections: int = 4, pool_maxsize: int = 8, retries: int = 3,
+                   backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Создает сессию с keep-alive соединениями и повторными попытками.
+
+    Args:
+        pool_connections: Число хостов, для которых держится пул соединений
+        pool_maxsize: Максимум соединений в пуле одного хоста
+        retries: Число повторов при сетевых ошибках и ответах 5xx (0 - без повторов)
+        backoff_factor: Множитель экспоненциальной паузы между повторами
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504) if retries else (),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry, pool_block=True)
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_shared_session: Optional[requests.Session] = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Общая сессия процесса: соединения с www.rbc.ru и rssexport.rbc.ru переиспользуются.
+
+    Сессия не повторяет запросы сама: повторы делает FetchEngine.get, чтобы
+    AdaptiveThrottle учитывал каждую попытку и не ждал пауз urllib3.
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session(retries=0)
+        return _shared_session
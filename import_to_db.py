@@ -3,10 +3,12 @@
 
 import json
 from database import NewsDB
+from article_fetcher import ArticleFetcher
 
 
 def import_from_json():
     db = NewsDB()
+    articles = ArticleFetcher()
     
     print("="*70)
     print("ИМПОРТ РЕЗУЛЬТАТОВ ПАРСИНГА В БАЗУ ДАННЫХ")
@@ -18,24 +20,20 @@ def import_from_json():
         with open('results/telegram_results.json', 'r', encoding='utf-8') as f:
             telegram_news = json.load(f)
         
-        telegram_count = 0
-        for news in telegram_news:
-            title = news['text'][:100] + '...' if len(news['text']) > 100 else news['text']
-            
-            success = db.add_news(
-                title=title,
-                content=news['text'],
-                date=news['date'] + ' 00:00:00',
-                source='Telegram @markettwits',
-                url=news['post_url'],
-                category='sberbank'
-            )
-            
-            if success:
-                telegram_count += 1
-                print(f"  ✓ {title[:60]}...")
+        telegram_count, duplicates = db.add_news_bulk(
+            {
+                'title': news['text'][:100] + '...' if len(news['text']) > 100 else news['text'],
+                'content': news['text'],
+                'date': news['date'] + ' 00:00:00',
+                'published': news.get('published'),
+                'source': 'Telegram @markettwits',
+                'url': news['post_url'],
+                'category': 'sberbank'
+            }
+            for news in telegram_news
+        )
         
-        print(f"\n✅ Импортировано из Telegram: {telegram_count} постов")
+        print(f"\n✅ Импортировано из Telegram: {telegram_count} постов (уже в базе: {duplicates})")
         
     except FileNotFoundError:
         print("⚠ Файл telegram_results.json не найден")
@@ -47,23 +45,23 @@ def import_from_json():
     try:
         with open('results/rbc_results.json', 'r', encoding='utf-8') as f:
             rbc_news = json.load(f)
+        articles.enrich(rbc_news, skip=db.existing_urls((news['url'] for news in rbc_news), with_content=True))
         
-        rbc_sber_count = 0
-        for news in rbc_news:
-            success = db.add_news(
-                title=news['title'],
-                content=news['title'],  # У РБК только заголовок
-                date=news['date'] + ' 00:00:00',
-                source='РБК',
-                url=news['url'],
-                category='sberbank'
-            )
-            
-            if success:
-                rbc_sber_count += 1
-                print(f"  ✓ {news['title'][:60]}...")
+        rbc_sber_count, duplicates = db.add_news_bulk(
+            {
+                'title': news['title'],
+                'content': news.get('content') or news['title'],  # полный текст, если загружен
+                'date': news['date'] + ' 00:00:00',
+                'published': news.get('published'),
+                'source': 'РБК',
+                'url': news['url'],
+                'category': 'sberbank'
+            }
+            for news in rbc_news
+        )
+        db.fill_content(rbc_news)
         
-        print(f"\n✅ Импортировано статей про Сбербанк: {rbc_sber_count}")
+        print(f"\n✅ Импортировано статей про Сбербанк: {rbc_sber_count} (уже в базе: {duplicates})")
         
     except FileNotFoundError:
         print("⚠ Файл rbc_results.json не найден")
@@ -77,23 +75,24 @@ def import_from_json():
     try:
         with open('results/rbc_investments_results.json', 'r', encoding='utf-8') as f:
             rbc_inv_news = json.load(f)
+        articles.enrich(rbc_inv_news,
+                        skip=db.existing_urls((news['url'] for news in rbc_inv_news), with_content=True))
         
-        rbc_inv_count = 0
-        for news in rbc_inv_news:
-            success = db.add_news(
-                title=news['title'],
-                content=news['title'],
-                date=news['date'] + ' 00:00:00',
-                source='РБК Инвестиции',
-                url=news['url'],
-                category='general'  # Общая категория для инвестиций
-            )
-            
-            if success:
-                rbc_inv_count += 1
-                print(f"  ✓ {news['title'][:60]}...")
+        rbc_inv_count, duplicates = db.add_news_bulk(
+            {
+                'title': news['title'],
+                'content': news.get('content') or news['title'],
+                'date': news['date'] + ' 00:00:00',
+                'published': news.get('published'),
+                'source': 'РБК Инвестиции',
+                'url': news['url'],
+                'category': 'general'  # Общая категория для инвестиций
+            }
+            for news in rbc_inv_news
+        )
+        db.fill_content(rbc_inv_news)
         
-        print(f"\n✅ Импортировано инвестиционных новостей: {rbc_inv_count}")
+        print(f"\n✅ Импортировано инвестиционных новостей: {rbc_inv_count} (уже в базе: {duplicates})")
         
     except FileNotFoundError:
         print("⚠ Файл rbc_investments_results.json не найден")
@@ -107,12 +106,12 @@ def import_from_json():
     print("📊 СТАТИСТИКА БАЗЫ ДАННЫХ")
     print("="*70)
     
-    all_news = db.get_all_news()
-    sber_news = db.get_all_news(category='sberbank')
+    stats = db.get_stats()
+    sber_count = stats['by_category'].get('sberbank', 0)
     
-    print(f"Всего новостей: {len(all_news)}")
-    print(f"Новостей про Сбербанк: {len(sber_news)}")
-    print(f"Общих новостей: {len(all_news) - len(sber_news)}")
+    print(f"Всего новостей: {stats['total']}")
+    print(f"Новостей про Сбербанк: {sber_count}")
+    print(f"Общих новостей: {stats['total'] - sber_count}")
     
     print("\n" + "="*70)
     print("✅ ИМПОРТ ЗАВЕРШЕН")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Поиск ключевых слов сразу нескольких тем за один проход по тексту
+
+from typing import Dict, Iterable, List, Set
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Ключевые слова для поиска новостей про Сбербанк
+SBERBANK_KEYWORDS = ['сбербанк', 'сбер', 'sberbank', 'sber']
+
+# Ключевые слова для инвестиционных новостей
+INVESTMENT_KEYWORDS = [
+    'инвестиц', 'акци', 'биржа', 'фонд', 'ценные бумаги',
+    'облигац', 'дивиденд', 'капитал', 'портфель', 'трейдинг',
+    'брокер', 'ipo', 'торги', 'котировк', 'индекс', 'рынок',
+    'валют', 'золото', 'нефть', 'газ', 'металл'
+]
+
+
+class KeywordMatcher:
+    """
+    Многошаблонный поиск ключевых слов (подстрок без учета регистра).
+
+    Если установлен pyahocorasick, все ключевые слова всех тем собираются
+    в один автомат Ахо-Корасик и текст просматривается один раз. Без него
+    используется поиск подстрок по одной копии текста в нижнем регистре -
+    в CPython это быстрее, чем регулярное выражение с альтернативами.
+    """
+
+    def __init__(self, topics: Dict[str, Iterable[str]]):
+        """
+        Args:
+            topics: {тема: [ключевые слова]}
+        """
+        self.keywords = {topic: [k.lower() for k in keywords] for topic, keywords in topics.items()}
+        self.topic_names = list(self.keywords)
+        self._automaton = None
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for topic, keywords in self.keywords.items():
+                for keyword in keywords:
+                    owners = automaton.get(keyword, frozenset())
+                    automaton.add_word(keyword, owners | {topic})
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def _scan(self, lowered: str, wanted: Iterable[str]) -> Set[str]:
+        wanted = set(wanted)
+        found: Set[str] = set()
+        if self._automaton is not None:
+            for _, owners in self._automaton.iter(lowered):
+                found |= owners & wanted
+                if found == wanted:
+                    break
+            return found
+
+        for topic in wanted:
+            if any(keyword in lowered for keyword in self.keywords[topic]):
+                found.add(topic)
+        return found
+
+    def matches(self, text: str, topic: str) -> bool:
+        """Есть ли в тексте ключевые слова темы"""
+        return bool(self._scan(text.lower(), (topic,)))
+
+    def topics(self, text: str) -> Set[str]:
+        """Все темы, ключевые слова которых встречаются в тексте"""
+        return self._scan(text.lower(), self.topic_names)
+
+    def classify_many(self, texts: Iterable[str]) -> List[Set[str]]:
+        """
+        Пакетная классификация списка текстов.
+
+        Returns:
+            List[Set[str]]: темы для каждого текста в исходном порядке
+        """
+        return [self.topics(text) for text in texts]
+
+
+# Общий сопоставитель для всех парсеров, компилируется один раз при импорте
+TOPIC_MATCHER = KeywordMatcher({
+    'sberbank': SBERBANK_KEYWORDS,
+    'investments': INVESTMENT_KEYWORDS,
+})
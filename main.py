@@ -9,7 +9,7 @@ import os
 from datetime import datetime
 from rbc_parser import RBCParser
 from rbc_investments_parser import RBCInvestmentsParser
-from telegram_selenium_parser import TelegramSeleniumParser
+from telegram_http_parser import TelegramHTTPParser
 
 
 def save_results(data, filename):
@@ -52,7 +52,12 @@ def main():
     print("-"*70)
     
     try:
-        telegram_parser = TelegramSeleniumParser(headless=True)
+        # Chrome нужен только при TELEGRAM_BACKEND=selenium
+        if os.environ.get('TELEGRAM_BACKEND', 'http') == 'selenium':
+            from telegram_selenium_parser import TelegramSeleniumParser
+            telegram_parser = TelegramSeleniumParser(headless=True)
+        else:
+            telegram_parser = TelegramHTTPParser()
         telegram_results = telegram_parser.parse_channel(
             channel_name='markettwits',
             target_messages=1000
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# Архив старых новостей: отдельная база SQLite на каждый месяц публикации
+
+import os
+import re
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_MONTH_FILE = re.compile(r'^news-(\d{4}-\d{2})\.db$')
+
+
+def month_of(record: Dict) -> str:
+    """Месяц публикации записи ('2024-05') - по published_at, иначе по date"""
+    if record.get('published_at') is not None:
+        return datetime.fromtimestamp(record['published_at']).strftime('%Y-%m')
+    return (record.get('date') or '')[:7] or 'unknown'
+
+
+class NewsArchive:
+    """
+    Архив новостей, вынесенных из news.db политикой хранения (retention.py).
+
+    Новости лежат в файлах <archive_dir>/news-ГГГГ-ММ.db по месяцу публикации;
+    текст (content) хранится сжатым zlib. Запрос к архиву открывает только
+    файлы нужных месяцев, от новых к старым.
+    """
+
+    # Поля архивной записи (совпадают с NewsDB.COLUMNS)
+    COLUMNS = ('id', 'title', 'content', 'date', 'source', 'url', 'category', 'published_at', 'story_id')
+
+    def __init__(self, archive_dir: str = 'archive'):
+        """
+        Args:
+            archive_dir: Каталог с архивными базами (создается при первой записи)
+        """
+        self.archive_dir = archive_dir
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f'news-{month}.db')
+
+    def months(self) -> List[str]:
+        """Месяцы, за которые есть архив, от новых к старым"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        found = (_MONTH_FILE.match(name) for name in os.listdir(self.archive_dir))
+        return sorted((match.group(1) for match in found if match), reverse=True)
+
+    def _open(self, month: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path(month), timeout=10)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS news (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                content BLOB,
+                date TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT UNIQUE NOT NULL,
+                category TEXT,
+                published_at INTEGER,
+                story_id INTEGER
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_news_published ON news(published_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_news_story ON news(story_id)')
+        return conn
+
+    def store(self, records: Sequence[Dict]) -> int:
+        """
+        Записывает новости в архив своих месяцев; уже архивированные (по url)
+        сохраняют текст, обновляется только сюжет.
+
+        Returns:
+            int: Сколько записей обработано
+        """
+        by_month: Dict[str, List[tuple]] = {}
+        for record in records:
+            content = record.get('content')
+            by_month.setdefault(month_of(record), []).append((
+                record['id'], record['title'],
+                zlib.compress(content.encode('utf-8')) if content is not None else None,
+                record['date'], record['source'], record['url'], record.get('category'),
+                record.get('published_at'), record.get('story_id'),
+            ))
+        if by_month:
+            os.makedirs(self.archive_dir, exist_ok=True)
+        for month, rows in by_month.items():
+            conn = self._open(month)
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO news (id, title, content, date, source, url, category, published_at, story_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (url) DO UPDATE SET story_id = excluded.story_id
+                    ''', rows)
+            finally:
+                conn.close()
+        return sum(len(rows) for rows in by_month.values())
+
+    @staticmethod
+    def _where(category, source, before, dedupe) -> Tuple[str, List]:
+        filters, filter_params = [], []
+        if category:
+            filters.append('{t}category = ?')
+            filter_params.append(category)
+        if source:
+            filters.append('{t}source = ?')
+            filter_params.append(source)
+        conditions = [condition.format(t='') for condition in filters]
+        params = list(filter_params)
+        if before is not None:
+            conditions.append('(published_at, id) < (?, ?)')
+            params.extend(before)
+        if dedupe:
+            extra = ''.join(' AND ' + condition.format(t='newer.') for condition in filters)
+            conditions.append(f'''NOT EXISTS (
+                SELECT 1 FROM news AS newer
+                WHERE newer.story_id = news.story_id
+                  AND (coalesce(newer.published_at, 0), newer.id) > (coalesce(news.published_at, 0), news.id){extra}
+            )''')
+            params.extend(filter_params)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
+
+    def _months_before(self, before: Optional[Tuple[int, int]]) -> List[str]:
+        """Месяцы, в которых могут быть записи старше курсора (новее курсора файлы не открываются)"""
+        if before is None or not before[0]:
+            return self.months()
+        last_month = datetime.fromtimestamp(before[0]).strftime('%Y-%m')
+        return [month for month in self.months() if month <= last_month]
+
+    def count(self, category=None, source=None, before: Optional[Tuple[int, int]] = None, dedupe=False) -> int:
+        """Сколько архивных новостей вернул бы get_news с теми же параметрами без limit"""
+        where, params = self._where(category, source, before, dedupe)
+        total = 0
+        for month in self._months_before(before):
+            conn = sqlite3.connect(f'file:{self._path(month)}?mode=ro', uri=True)
+            try:
+                total += conn.execute(f'SELECT COUNT(*) FROM news {where}', params).fetchone()[0]
+            finally:
+                conn.close()
+        return total
+
+    def get_news(self, limit=20, offset=0, category=None, source=None,
+                 before: Optional[Tuple[int, int]] = None, columns: Sequence[str] = ('title', 'content'),
+                 dedupe=False) -> Tuple[List[Dict], Optional[Tuple[int, int]]]:
+        """
+        Страница архивных новостей от новых к старым (параметры как у NewsDB.get_news).
+
+        С dedupe в каждом месячном файле остается самая свежая подходящая под
+        фильтры запись сюжета.
+
+        Returns:
+            (records, cursor): записи и курсор (published_at, id) последней из них
+        """
+        where, params = self._where(category, source, before, dedupe)
+        records, cursor = [], None
+        for month in self._months_before(before):
+            if len(records) >= limit:
+                break
+            conn = sqlite3.connect(f'file:{self._path(month)}?mode=ro', uri=True)
+            try:
+                if offset:
+                    count = conn.execute(f'SELECT COUNT(*) FROM news {where}', params).fetchone()[0]
+                    if count <= offset:
+                        offset -= count
+                        continue
+                rows = conn.execute(f'''
+                    SELECT {', '.join(columns)}, published_at, id FROM news
+                    {where}
+                    ORDER BY published_at DESC, id DESC
+                    LIMIT ? OFFSET ?
+                ''', params + [limit - len(records), offset]).fetchall()
+            finally:
+                conn.close()
+            offset = 0
+            for row in rows:
+                record = dict(zip(columns, row))
+                if record.get('content') is not None:
+                    record['content'] = zlib.decompress(record['content']).decode('utf-8')
+                records.append(record)
+                cursor = (row[-2] or 0, row[-1])
+        return records, cursor
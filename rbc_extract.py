@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Быстрое извлечение статей со страниц рубрик РБК
+
+from lxml import etree, html
+from typing import Dict, List, Optional
+
+# Регистронезависимый поиск подстроки в @class на чистом XPath (без вызовов Python)
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def _class_contains(*words: str) -> str:
+    lowered = f"translate(@class, '{_UPPER}', '{_LOWER}')"
+    return ' or '.join(f"contains({lowered}, '{word}')" for word in words)
+
+
+# XPath-выражения компилируются один раз при импорте модуля
+_ARTICLE_BLOCKS = etree.XPath(
+    f"//*[self::a or self::div][@class][{_class_contains('item', 'card', 'news', 'article')}]"
+)
+_FEED_LINKS = etree.XPath(
+    "//a[contains(@class, 'item__link') or contains(@class, 'news-feed__item')]"
+)
+# Абзацы основного текста статьи; если разметка другая - абзацы <article> или всей страницы
+_ARTICLE_PARAGRAPHS = (
+    etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' article__text ')]//p"),
+    etree.XPath("//article//p"),
+    etree.XPath("//p"),
+)
+
+# Поиск внутри блока - обход потомков без XPath: на сотнях блоков это
+# в несколько раз быстрее, чем отдельный вызов XPath для каждого блока
+_TITLE_TAGS = ('span', 'div', 'h3', 'h2')
+_TITLE_CLASSES = ('title', 'headline')
+_DATE_TAGS = ('time', 'span')
+_DATE_CLASSES = ('date', 'time')
+
+# РБК отдает страницы в UTF-8; комментарии не нужны ни для текста, ни для поиска
+_PARSER = html.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+def _parse(body: bytes) -> Optional[etree._Element]:
+    return html.fromstring(body, parser=_PARSER) if body.strip() else None
+
+
+def _find(block: etree._Element, tags, class_words) -> Optional[etree._Element]:
+    """Первый потомок с одним из тегов, в классе которого есть одно из слов"""
+    for elem in block.iter(*tags):
+        if elem is block:
+            continue
+        css_class = elem.get('class')
+        if css_class:
+            css_class = css_class.lower()
+            if any(word in css_class for word in class_words):
+                return elem
+    return None
+
+
+def _text(elem: etree._Element) -> str:
+    """Аналог BeautifulSoup.get_text(strip=True)"""
+    return ''.join(part.strip() for part in elem.itertext())
+
+
+def extract_article_blocks(body: bytes) -> List[Dict]:
+    """
+    Блоки новостей страницы рубрики: <a>/<div> с классом item/card/news/article.
+
+    Returns:
+        List[Dict]: {'title', 'link', 'date_text'} для блоков со ссылкой
+    """
+    root = _parse(body)
+    if root is None:
+        return []
+
+    extracted = []
+    for block in _ARTICLE_BLOCKS(root):
+        title_elem = _find(block, _TITLE_TAGS, _TITLE_CLASSES)
+        title = _text(title_elem if title_elem is not None else block)
+
+        if block.tag == 'a':
+            link = block.get('href')
+        else:
+            link_elem = next(block.iter('a'), None)
+            link = link_elem.get('href') if link_elem is not None else None
+        if not link:
+            continue
+
+        date_text = None
+        date_elem = _find(block, _DATE_TAGS, _DATE_CLASSES)
+        if date_elem is not None:
+            date_text = date_elem.get('datetime') or _text(date_elem)
+
+        extracted.append({'title': title, 'link': link, 'date_text': date_text})
+
+    return extracted
+
+
+def extract_feed_links(body: bytes, limit: int = 30) -> List[Dict]:
+    """
+    Ссылки ленты новостей раздела (a.item__link / a.news-feed__item).
+
+    Returns:
+        List[Dict]: {'title', 'url'} для первых limit ссылок
+    """
+    root = _parse(body)
+    if root is None:
+        return []
+
+    return [
+        {'title': _text(link), 'url': link.get('href', '')}
+        for link in _FEED_LINKS(root)[:limit]
+    ]
+
+
+def extract_article_text(body: bytes) -> str:
+    """
+    Основной текст статьи: абзацы div.article__text, разделенные пустой строкой.
+
+    Returns:
+        str: текст статьи или пустая строка, если абзацев не найдено
+    """
+    root = _parse(body)
+    if root is None:
+        return ''
+
+    for paragraphs in _ARTICLE_PARAGRAPHS:
+        texts = [' '.join(p.text_content().split()) for p in paragraphs(root)]
+        texts = [text for text in texts if text]
+        if texts:
+            return '\n\n'.join(texts)
+    return ''
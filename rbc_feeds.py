@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Общий слой загрузки RSS-лент РБК
+
+import requests
+from datetime import datetime
+from typing import Iterable, List, Dict, Optional
+import xml.etree.ElementTree as ET
+from http_cache import HTTPCache
+from date_utils import parse_date
+from crawl_state import CrawlState
+
+
+class RBCFeedFetcher:
+    """
+    Загружает и разбирает RSS-ленты РБК один раз за запуск.
+
+    Один экземпляр можно передать нескольким парсерам (классификаторам):
+    первый вызов fetch() скачивает ленты, остальные получают уже
+    разобранные элементы из памяти. Каждый классификатор сообщает свою
+    границу по дате через require_since(), и ленты читаются до самой ранней.
+    """
+
+    # RSS-ленты РБК
+    RSS_FEEDS = [
+        "https://rssexport.rbc.ru/rbcnews/news/30/full.rss",
+        "https://rssexport.rbc.ru/rbcnews/business/30/full.rss",
+        "https://rssexport.rbc.ru/rbcnews/economics/30/full.rss",
+    ]
+
+    # Сколько элементов подряд старше границы означает конец нужной части ленты
+    STALE_ITEMS_TO_STOP = 3
+
+    def __init__(self, feeds: Optional[List[str]] = None, cache: Optional[HTTPCache] = None,
+                 since: Optional[datetime] = None, state: Optional[CrawlState] = None):
+        """
+        Args:
+            feeds: Список RSS-лент (по умолчанию RSS_FEEDS)
+            cache: HTTP-кэш; неизменившиеся ленты не скачиваются и не разбираются повторно
+            since: Самая ранняя нужная дата; более старые элементы не читаются
+            state: Состояние инкрементального обхода; если задано, возвращаются
+                   только элементы, не встречавшиеся в прошлых запусках
+        """
+        self.feeds = feeds or self.RSS_FEEDS
+        self.cache = cache or HTTPCache()
+        self.since = since
+        self.state = state
+        self._items: Optional[Dict[str, List[Dict]]] = None
+
+    def require_since(self, since: datetime):
+        """
+        Сообщает, что классификатору нужны элементы начиная с since.
+
+        Если ленты уже были прочитаны с более поздней границей,
+        они будут перечитаны при следующем вызове fetch().
+        """
+        if self.since is None or since < self.since:
+            if self._items is not None and self.since is not None:
+                self._items = None
+            self.since = since
+
+    @staticmethod
+    def _text(item: ET.Element, tag: str) -> Optional[str]:
+        elem = item.find(tag)
+        return elem.text if elem is not None else None
+
+    def _is_known(self, feed_url: str, item: Dict) -> bool:
+        return self.state is not None and self.state.is_known(f"rss:{feed_url}", item['link'])
+
+    def _parse_feed_stream(self, chunks: Iterable[bytes], feed_url: str) -> List[Dict]:
+        """
+        Потоково разбирает XML ленты в список словарей.
+
+        Каждый <item> освобождается сразу после обработки. Лента упорядочена
+        от новых к старым, поэтому чтение прекращается, как только подряд
+        встречаются STALE_ITEMS_TO_STOP элементов старше self.since
+        или уже обработанных в прошлых запусках.
+        """
+        parser = ET.XMLPullParser(events=('end',))
+        items = []
+        stale = 0
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if elem.tag != 'item':
+                    continue
+
+                item = {
+                    'title': self._text(elem, 'title'),
+                    'link': self._text(elem, 'link'),
+                    'pub_date': self._text(elem, 'pubDate'),
+                    'description': self._text(elem, 'description'),
+                }
+                elem.clear()
+
+                pub_date = parse_date(item['pub_date']) if item['pub_date'] else None
+                too_old = self.since is not None and pub_date is not None and pub_date < self.since
+                if too_old or self._is_known(feed_url, item):
+                    stale += 1
+                    if stale >= self.STALE_ITEMS_TO_STOP:
+                        return items
+                    continue
+                stale = 0
+                items.append(item)
+
+        parser.close()
+        return items
+
+    def _fetch_feed(self, feed_url: str) -> List[Dict]:
+        """Загружает одну ленту; при ошибке возвращает пустой список"""
+        try:
+            response = self.cache.fetch_stream(
+                feed_url, lambda chunks: self._parse_feed_stream(chunks, feed_url), since=self.since
+            )
+
+            if response.data is None:
+                print(f"  ⚠ Ошибка {response.status_code}: {feed_url}")
+                return []
+
+            # Данные из кэша могли быть разобраны до прошлого запуска
+            items = [item for item in response.data if not self._is_known(feed_url, item)]
+            if self.state is not None:
+                dates = [parse_date(item['pub_date']) for item in items if item['pub_date']]
+                self.state.remember(f"rss:{feed_url}", [item['link'] for item in items if item['link']],
+                                    newest=max(filter(None, dates), default=None))
+
+            note = " (не изменилась, из кэша)" if response.from_cache else ""
+            print(f"  Загружена RSS: {feed_url} - новых элементов: {len(items)}{note}")
+            return items
+
+        except requests.exceptions.RequestException as e:
+            print(f"  ✗ Ошибка запроса {feed_url}: {e}")
+        except ET.ParseError as e:
+            print(f"  ✗ Ошибка парсинга XML {feed_url}: {e}")
+        return []
+
+    def fetch(self) -> Dict[str, List[Dict]]:
+        """
+        Возвращает элементы всех лент: {feed_url: [item, ...]}
+
+        Ленты скачиваются параллельно и только при первом вызове.
+        """
+        if self._items is not None:
+            return self._items
+
+        results = self.cache.engine.map(self._fetch_feed, self.feeds)
+        self._items = dict(zip(self.feeds, results))
+        return self._items
+
+    def items(self) -> List[Dict]:
+        """Все элементы всех лент в порядке лент"""
+        return [item for items in self.fetch().values() for item in items]
@@ -2,24 +2,19 @@
 # Парсер инвестиционных новостей РБК
 
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import time
-import re
-from typing import List, Dict
-import xml.etree.ElementTree as ET
+from datetime import timedelta
+from typing import List, Dict, Optional
+from rbc_feeds import RBCFeedFetcher
+from http_cache import HTTPCache
+from rbc_extract import extract_feed_links
+from keyword_matcher import INVESTMENT_KEYWORDS, TOPIC_MATCHER
+from date_utils import DateParser, local_now
+from crawl_state import CrawlState
 
 
 class RBCInvestmentsParser:
     """Парсер инвестиционных новостей РБК"""
     
-    # RSS-ленты для инвестиций
-    RSS_FEEDS = [
-        "https://rssexport.rbc.ru/rbcnews/news/30/full.rss",
-        "https://rssexport.rbc.ru/rbcnews/business/30/full.rss",
-        "https://rssexport.rbc.ru/rbcnews/economics/30/full.rss",
-    ]
-    
     # Рубрики для HTML-парсинга
     HTML_SECTIONS = [
         "https://www.rbc.ru/finances/",
@@ -29,154 +24,136 @@ class RBCInvestmentsParser:
     ]
     
     # Ключевые слова для инвестиционных новостей
-    INVESTMENT_KEYWORDS = [
-        'инвестиц', 'акци', 'биржа', 'фонд', 'ценные бумаги',
-        'облигац', 'дивиденд', 'капитал', 'портфель', 'трейдинг',
-        'брокер', 'ipo', 'торги', 'котировк', 'индекс', 'рынок',
-        'валют', 'золото', 'нефть', 'газ', 'металл'
-    ]
+    INVESTMENT_KEYWORDS = INVESTMENT_KEYWORDS
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
-        }
-        self.cutoff_date = datetime.now() - timedelta(days=7)  # Последние 7 дней
+    def __init__(self, feed: Optional[RBCFeedFetcher] = None, cache: Optional[HTTPCache] = None,
+                 state: Optional[CrawlState] = None):
+        """
+        Args:
+            feed: Общий загрузчик RSS-лент (чтобы не скачивать ленты повторно)
+            cache: HTTP-кэш для страниц разделов
+            state: Состояние инкрементального обхода (None - полный обход)
+        """
+        self.cache = cache or (feed.cache if feed else HTTPCache())
+        self.state = state if state is not None else (feed.state if feed else None)
+        self.feed = feed or RBCFeedFetcher(cache=self.cache, state=self.state)
+        self.cutoff_date = local_now() - timedelta(days=7)  # Последние 7 дней
+        self.dates = DateParser()
+        self.feed.require_since(self.cutoff_date)
         print(f"Ищем инвестиционные статьи начиная с: {self.cutoff_date.strftime('%Y-%m-%d')}")
     
     def _is_investment_news(self, text: str) -> bool:
         """Проверяет, относится ли новость к инвестициям"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.INVESTMENT_KEYWORDS)
-    
-    def _parse_date(self, date_str: str) -> datetime:
-        """Парсит дату из различных форматов"""
-        try:
-            # RFC 2822 format (RSS)
-            from email.utils import parsedate_to_datetime
-            dt = parsedate_to_datetime(date_str)
-            # Убираем timezone info для сравнения
-            return dt.replace(tzinfo=None)
-        except:
-            try:
-                # ISO format
-                dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                return dt.replace(tzinfo=None)
-            except:
-                return datetime.now()
+        return TOPIC_MATCHER.matches(text, 'investments')
     
     def parse_rss_feeds(self) -> List[Dict]:
         """Парсит RSS-ленты РБК"""
         results = []
         
-        for feed_url in self.RSS_FEEDS:
+        for feed_url, items in self.feed.fetch().items():
             print(f"\n🔍 Проверка RSS: {feed_url}")
             
-            try:
-                response = requests.get(feed_url, headers=self.headers, timeout=10)
+            items_count = 0
+            found_count = 0
+            
+            for item in items:
+                items_count += 1
                 
-                if response.status_code == 404:
-                    print(f"  ⚠ RSS недоступен (404)")
-                    continue
-                    
-                response.raise_for_status()
+                title = item['title']
+                url = item['link']
+                description = item['description'] or ""
                 
-                # Парсим XML
-                root = ET.fromstring(response.content)
+                if title is None or url is None:
+                    continue
                 
-                items_count = 0
-                found_count = 0
+                # Проверяем дату (без pubDate - по адресу статьи)
+                pub_date = self.dates.parse(item['pub_date'], url=url)
+                if pub_date is None or pub_date < self.cutoff_date:
+                    continue
                 
-                # Ищем элементы item в RSS
-                for item in root.findall('.//item'):
-                    items_count += 1
-                    
-                    title_elem = item.find('title')
-                    link_elem = item.find('link')
-                    pub_date_elem = item.find('pubDate')
-                    description_elem = item.find('description')
-                    
-                    if title_elem is None or link_elem is None:
-                        continue
-                    
-                    title = title_elem.text
-                    url = link_elem.text
-                    description = description_elem.text if description_elem is not None else ""
+                # Проверяем, относится ли к инвестициям
+                full_text = f"{title} {description}"
+                if self._is_investment_news(full_text):
+                    date_str = pub_date.strftime('%Y-%m-%d')
                     
-                    # Проверяем дату
-                    if pub_date_elem is not None:
-                        pub_date = self._parse_date(pub_date_elem.text)
-                        if pub_date < self.cutoff_date:
-                            continue
-                    
-                    # Проверяем, относится ли к инвестициям
-                    full_text = f"{title} {description}"
-                    if self._is_investment_news(full_text):
-                        date_str = pub_date.strftime('%Y-%m-%d') if pub_date_elem else datetime.now().strftime('%Y-%m-%d')
-                        
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'date': date_str,
-                            'source': 'RSS'
-                        })
-                        found_count += 1
-                        print(f"  ✓ [{date_str}] {title[:60]}...")
-                
-                print(f"  Проверено: {items_count} новостей, найдено инвестиционных: {found_count}")
-                time.sleep(1)
-                
-            except requests.exceptions.Timeout:
-                print(f"  ✗ Таймаут соединения")
-            except requests.exceptions.RequestException as e:
-                print(f"  ✗ Ошибка запроса: {e}")
-            except ET.ParseError as e:
-                print(f"  ✗ Ошибка парсинга XML: {e}")
+                    results.append({
+                        'title': title,
+                        'url': url,
+                        'date': date_str,
+                        'published': pub_date.isoformat(),
+                        'source': 'RSS'
+                    })
+                    found_count += 1
+                    print(f"  ✓ [{date_str}] {title[:60]}...")
+            
+            print(f"  Проверено: {items_count} новостей, найдено инвестиционных: {found_count}")
         
         return results
     
+    def _extract_articles(self, body: bytes) -> List[Dict]:
+        """Извлекает ссылки на статьи со страницы раздела (без фильтрации)"""
+        return extract_feed_links(body, limit=30)  # Берем первые 30 статей
+    
+    def _fetch_section(self, section_url: str):
+        """Загружает раздел; при ошибке возвращает текст ошибки вместо ответа"""
+        try:
+            return self.cache.fetch(section_url, self._extract_articles,
+                                    key=f"rbc_investments_parser:{section_url}")
+        except requests.exceptions.RequestException as e:
+            return e
+    
     def parse_html_sections(self, max_pages: int = 3) -> List[Dict]:
-        """Парсит HTML-разделы РБК"""
+        """Парсит HTML-разделы РБК (разделы загружаются параллельно)"""
         results = []
         
-        for section_url in self.HTML_SECTIONS:
+        responses = self.cache.engine.map(self._fetch_section, self.HTML_SECTIONS)
+        
+        for section_url, response in zip(self.HTML_SECTIONS, responses):
             print(f"\n🔍 Проверка раздела: {section_url}")
             
-            try:
-                response = requests.get(section_url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
+            if isinstance(response, Exception):
+                print(f"  ✗ Ошибка загрузки: {response}")
+                continue
+            if response.data is None:
+                print(f"  ✗ Ошибка загрузки: HTTP {response.status_code}")
+                continue
+            
+            found_count = 0
+            source = f"rbc_investments_parser:html:{section_url}"
+            page_urls = []
+            
+            for article in response.data:
+                title = article['title']
+                url = article['url']
                 
-                # Ищем статьи на странице
-                articles = soup.find_all('a', class_=re.compile(r'(item__link|news-feed__item)'))
+                if not url.startswith('http'):
+                    url = f"https://www.rbc.ru{url}"
                 
-                found_count = 0
+                # При инкрементальном обходе пропускаем статьи из прошлых запусков
+                page_urls.append(url)
+                if self.state is not None and self.state.is_known(source, url):
+                    continue
                 
-                for article in articles[:30]:  # Берем первые 30 статей
-                    title = article.get_text(strip=True)
-                    url = article.get('href', '')
-                    
-                    if not url.startswith('http'):
-                        url = f"https://www.rbc.ru{url}"
+                # Проверяем, относится ли к инвестициям
+                if self._is_investment_news(title):
+                    # На странице раздела даты нет - берем ее из адреса статьи
+                    pub_date = self.dates.parse(None, url=url)
+                    if pub_date is None:
+                        continue
                     
-                    # Проверяем, относится ли к инвестициям
-                    if self._is_investment_news(title):
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'date': datetime.now().strftime('%Y-%m-%d'),
-                            'source': 'HTML'
-                        })
-                        found_count += 1
-                        print(f"  ✓ {title[:60]}...")
-                
-                print(f"  Найдено инвестиционных новостей: {found_count}")
-                time.sleep(2)  # Задержка между запросами
-                
-            except requests.exceptions.RequestException as e:
-                print(f"  ✗ Ошибка загрузки: {e}")
+                    results.append({
+                        'title': title,
+                        'url': url,
+                        'date': pub_date.strftime('%Y-%m-%d'),
+                        'published': pub_date.isoformat(),
+                        'source': 'HTML'
+                    })
+                    found_count += 1
+                    print(f"  ✓ {title[:60]}...")
+            
+            if self.state is not None:
+                self.state.remember(source, page_urls)
+            print(f"  Найдено инвестиционных новостей: {found_count}")
         
         return results
     
@@ -206,6 +183,9 @@ class RBCInvestmentsParser:
                 unique_results.append(result)
                 seen_urls.add(result['url'])
         
+        if self.dates.failures:
+            print(f"\n⚠ Пропущено записей с неразобранной датой: {self.dates.failures}")
+        
         print(f"\n✅ Итого уникальных инвестиционных новостей: {len(unique_results)}")
         
         return unique_results
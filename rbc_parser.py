@@ -1,25 +1,19 @@
 #!/usr/bin/env python3
 # Парсер новостей РБК про Сбербанк
 
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import time
-import re
-from typing import List, Dict
-import xml.etree.ElementTree as ET
+from datetime import timedelta
+from typing import List, Dict, Optional
+from rbc_feeds import RBCFeedFetcher
+from http_cache import HTTPCache
+from rbc_extract import extract_article_blocks
+from keyword_matcher import SBERBANK_KEYWORDS, TOPIC_MATCHER
+from date_utils import DateParser, local_now
+from crawl_state import CrawlState
 
 
 class RBCParser:
     """Парсер новостей РБК с поддержкой RSS и HTML"""
     
-    # RSS-ленты РБК
-    RSS_FEEDS = [
-        "https://rssexport.rbc.ru/rbcnews/news/30/full.rss",
-        "https://rssexport.rbc.ru/rbcnews/business/30/full.rss",
-        "https://rssexport.rbc.ru/rbcnews/economics/30/full.rss",
-    ]
-    
     # Рубрики для HTML-парсинга
     HTML_SECTIONS = [
         "https://www.rbc.ru/finances/",
@@ -29,38 +23,27 @@ class RBCParser:
     ]
     
     # Ключевые слова для поиска
-    KEYWORDS = ['сбербанк', 'сбер', 'sberbank', 'sber']
+    KEYWORDS = SBERBANK_KEYWORDS
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
-        }
-        self.cutoff_date = datetime.now() - timedelta(days=60)
+    def __init__(self, feed: Optional[RBCFeedFetcher] = None, cache: Optional[HTTPCache] = None,
+                 state: Optional[CrawlState] = None):
+        """
+        Args:
+            feed: Общий загрузчик RSS-лент (чтобы не скачивать ленты повторно)
+            cache: HTTP-кэш для страниц рубрик
+            state: Состояние инкрементального обхода (None - полный обход)
+        """
+        self.cache = cache or (feed.cache if feed else HTTPCache())
+        self.state = state if state is not None else (feed.state if feed else None)
+        self.feed = feed or RBCFeedFetcher(cache=self.cache, state=self.state)
+        self.cutoff_date = local_now() - timedelta(days=60)
+        self.dates = DateParser()
+        self.feed.require_since(self.cutoff_date)
         print(f"Ищем статьи начиная с: {self.cutoff_date.strftime('%Y-%m-%d')}")
     
     def _contains_keyword(self, text: str) -> bool:
         """Проверяет наличие ключевых слов в тексте"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.KEYWORDS)
-    
-    def _parse_date(self, date_str: str) -> datetime:
-        """Парсит дату из различных форматов"""
-        # Формат RSS: Wed, 13 Nov 2025 12:00:00 +0300
-        formats = [
-            '%a, %d %b %Y %H:%M:%S %z',
-            '%Y-%m-%dT%H:%M:%S%z',
-            '%Y-%m-%d %H:%M:%S',
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except:
-                continue
-        
-        return datetime.now()
+        return TOPIC_MATCHER.matches(text, 'sberbank')
     
     def parse_rss_feeds(self) -> List[Dict]:
         """Парсит RSS-ленты РБК"""
@@ -68,158 +51,146 @@ class RBCParser:
         results = []
         seen_urls = set()
         
-        for feed_url in self.RSS_FEEDS:
+        for item in self.feed.items():
             try:
-                print(f"  Загружаю: {feed_url}")
-                response = requests.get(feed_url, headers=self.headers, timeout=10)
+                title = item['title']
+                link = item['link']
+                pub_date = item['pub_date']
+                if not (title and link and pub_date):
+                    continue
                 
-                if response.status_code != 200:
-                    print(f"  ⚠ Ошибка {response.status_code}")
+                # Проверяем наличие ключевых слов в заголовке
+                if not self._contains_keyword(title):
                     continue
                 
-                # Парсим XML
-                root = ET.fromstring(response.content)
-                items = root.findall('.//item')
+                # Парсим и проверяем дату
+                date_obj = self.dates.parse(pub_date)
+                if date_obj is None or date_obj < self.cutoff_date:
+                    continue
                 
-                for item in items:
-                    try:
-                        title = item.find('title').text
-                        link = item.find('link').text
-                        pub_date = item.find('pubDate').text
-                        
-                        # Проверяем наличие ключевых слов в заголовке
-                        if not self._contains_keyword(title):
-                            continue
-                        
-                        # Парсим и проверяем дату
-                        date_obj = self._parse_date(pub_date)
-                        if date_obj < self.cutoff_date:
-                            continue
-                        
-                        # Избегаем дубликатов
-                        if link in seen_urls:
-                            continue
-                        seen_urls.add(link)
-                        
-                        results.append({
-                            'title': title,
-                            'url': link,
-                            'date': date_obj.strftime('%Y-%m-%d')
-                        })
-                        
-                        print(f"    ✓ [{date_obj.strftime('%Y-%m-%d')}] {title[:60]}...")
-                        
-                    except Exception as e:
-                        continue
+                # Избегаем дубликатов
+                if link in seen_urls:
+                    continue
+                seen_urls.add(link)
+                
+                results.append({
+                    'title': title,
+                    'url': link,
+                    'date': date_obj.strftime('%Y-%m-%d'),
+                    'published': date_obj.isoformat()
+                })
                 
-                # Anti-ban задержка
-                time.sleep(1)
+                print(f"    ✓ [{date_obj.strftime('%Y-%m-%d')}] {title[:60]}...")
                 
             except Exception as e:
-                print(f"  ✗ Ошибка парсинга {feed_url}: {e}")
                 continue
         
         print(f"  → Найдено в RSS: {len(results)} статей")
         return results
     
+    def _extract_articles(self, body: bytes) -> List[Dict]:
+        """Извлекает со страницы рубрики все блоки новостей (без фильтрации)"""
+        return extract_article_blocks(body)
+    
+    def _normalize_link(self, link: str) -> Optional[str]:
+        """Приводит ссылку к абсолютному URL"""
+        if link.startswith('/'):
+            return f"https://www.rbc.ru{link}"
+        if link.startswith('http'):
+            return link
+        return None
+    
+    def _crawl_section(self, section_url: str, max_pages: int) -> List[Dict]:
+        """
+        Обходит страницы одной рубрики по порядку.
+        
+        Останавливается на первой странице без статей по ключевым словам,
+        а при инкрементальном обходе - на странице, где встретились статьи,
+        известные по прошлым запускам.
+        """
+        source = f"rbc_parser:html:{section_url}"
+        articles = []
+        
+        for page in range(1, max_pages + 1):
+            try:
+                # Формируем URL с пагинацией
+                if page == 1:
+                    url = section_url
+                else:
+                    url = f"{section_url}?page={page}"
+                
+                response = self.cache.fetch(url, self._extract_articles,
+                                            key=f"rbc_parser:{url}")
+                
+                if response.data is None:
+                    break
+                
+                reached_known = False
+                page_links = []
+                page_articles = []
+                for article in response.data:
+                    link = self._normalize_link(article['link'])
+                    if not link:
+                        continue
+                    page_links.append(link)
+                    if self.state is not None and self.state.is_known(source, link):
+                        reached_known = True
+                        continue
+                    if self._contains_keyword(article['title']):
+                        page_articles.append(dict(article, link=link, page=page))
+                
+                if self.state is not None:
+                    self.state.remember(source, page_links)
+                
+                articles.extend(page_articles)
+                if reached_known:
+                    break  # Дальше только статьи, обработанные в прошлых запусках
+                if not page_articles:
+                    break  # Переходим к следующему разделу
+                
+            except Exception as e:
+                print(f"    ✗ Ошибка страницы {section_url} (стр.{page}): {e}")
+                break
+        
+        return articles
+    
     def parse_html_sections(self, max_pages=5) -> List[Dict]:
-        """Парсит HTML-страницы рубрик РБК"""
+        """Парсит HTML-страницы рубрик РБК (рубрики загружаются параллельно)"""
         print("\n[2/2] Парсинг HTML-страниц РБК...")
         results = []
         seen_urls = set()
         
-        for section_url in self.HTML_SECTIONS:
+        sections = self.cache.engine.map(
+            lambda section_url: self._crawl_section(section_url, max_pages),
+            self.HTML_SECTIONS
+        )
+        
+        for section_url, articles in zip(self.HTML_SECTIONS, sections):
             print(f"  Раздел: {section_url}")
             
-            for page in range(1, max_pages + 1):
-                try:
-                    # Формируем URL с пагинацией
-                    if page == 1:
-                        url = section_url
-                    else:
-                        url = f"{section_url}?page={page}"
-                    
-                    response = requests.get(url, headers=self.headers, timeout=10)
-                    
-                    if response.status_code != 200:
-                        break
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Ищем блоки новостей
-                    # РБК использует различные классы для новостных блоков
-                    articles = soup.find_all(['a', 'div'], class_=re.compile(r'(item|card|news|article)', re.I))
-                    
-                    page_found = 0
-                    for article in articles:
-                        try:
-                            # Ищем заголовок
-                            title_elem = article.find(['span', 'div', 'h3', 'h2'], class_=re.compile(r'(title|headline)', re.I))
-                            if not title_elem:
-                                title_elem = article
-                            
-                            title = title_elem.get_text(strip=True)
-                            
-                            # Проверяем ключевые слова
-                            if not self._contains_keyword(title):
-                                continue
-                            
-                            # Ищем ссылку
-                            link = None
-                            if article.name == 'a':
-                                link = article.get('href')
-                            else:
-                                link_elem = article.find('a')
-                                if link_elem:
-                                    link = link_elem.get('href')
-                            
-                            if not link:
-                                continue
-                            
-                            # Нормализуем URL
-                            if link.startswith('/'):
-                                link = f"https://www.rbc.ru{link}"
-                            elif not link.startswith('http'):
-                                continue
-                            
-                            # Избегаем дубликатов
-                            if link in seen_urls:
-                                continue
-                            seen_urls.add(link)
-                            
-                            # Пытаемся извлечь дату
-                            date_elem = article.find(['time', 'span'], class_=re.compile(r'(date|time)', re.I))
-                            date_str = datetime.now().strftime('%Y-%m-%d')
-                            
-                            if date_elem:
-                                date_text = date_elem.get('datetime') or date_elem.get_text(strip=True)
-                                try:
-                                    date_obj = self._parse_date(date_text)
-                                    date_str = date_obj.strftime('%Y-%m-%d')
-                                except:
-                                    pass
-                            
-                            results.append({
-                                'title': title,
-                                'url': link,
-                                'date': date_str
-                            })
-                            
-                            page_found += 1
-                            print(f"    ✓ [стр.{page}] {title[:60]}...")
-                            
-                        except Exception as e:
-                            continue
-                    
-                    if page_found == 0:
-                        break  # Переходим к следующему разделу
-                    
-                    # Anti-ban задержка
-                    time.sleep(2)
-                    
-                except Exception as e:
-                    print(f"    ✗ Ошибка страницы {page}: {e}")
-                    break
+            for article in articles:
+                title = article['title']
+                
+                link = article['link']
+                
+                # Избегаем дубликатов
+                if link in seen_urls:
+                    continue
+                seen_urls.add(link)
+                
+                # Дата из блока, иначе из адреса статьи
+                date_obj = self.dates.parse(article['date_text'], url=link)
+                if date_obj is None:
+                    continue
+                
+                results.append({
+                    'title': title,
+                    'url': link,
+                    'date': date_obj.strftime('%Y-%m-%d'),
+                    'published': date_obj.isoformat()
+                })
+                
+                print(f"    ✓ [стр.{article['page']}] {title[:60]}...")
         
         print(f"  → Найдено в HTML: {len(results)} статей")
         return results
@@ -249,6 +220,9 @@ class RBCParser:
                     all_results.append(item)
                     seen_urls.add(item['url'])
         
+        if self.dates.failures:
+            print(f"\n⚠ Пропущено записей с неразобранной датой: {self.dates.failures}")
+        
         print("\n" + "="*70)
         print(f"✅ ИТОГО найдено: {len(all_results)} статей про Сбербанк")
         print("="*70)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# Политика хранения news.db: архивирование старых новостей, обрезка текста и сжатие файла
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from news_archive import NewsArchive
+
+
+class RetentionPolicy:
+    """
+    Уровни хранения новостей:
+
+    - горячие (моложе cold_days) - хранятся целиком;
+    - холодные (от cold_days до horizon_days) - полный текст копируется
+      в архив, в news.db остается начало текста (preview_chars символов);
+    - старше horizon_days - переносятся в архив (NewsArchive) и удаляются
+      из news.db вместе с записями полнотекстового индекса и полос MinHash.
+
+    Счетчики news_daily_stats уменьшаются триггерами при удалении, поэтому
+    get_stats описывает только новости в news.db. Освободившиеся страницы
+    возвращаются файловой системе инкрементальным VACUUM небольшими шагами.
+    """
+
+    def __init__(self, db, archive: Optional[NewsArchive] = None, horizon_days: int = 180,
+                 cold_days: int = 30, preview_chars: int = 300, batch_size: int = 1000):
+        """
+        Args:
+            db: NewsDB
+            archive: Архив (по умолчанию - архив самой базы, db.archive)
+            horizon_days: Новости старше стольких дней уходят в архив
+            cold_days: У новостей старше стольких дней обрезается текст
+            preview_chars: Сколько символов текста оставить холодной новости
+            batch_size: Записей в одной транзакции (короткие транзакции не задерживают импорт)
+        """
+        self.db = db
+        self.archive = archive or db.archive
+        self.horizon_days = horizon_days
+        self.cold_days = cold_days
+        self.preview_chars = preview_chars
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _cutoff(days: int, now: Optional[datetime]) -> int:
+        return int(((now or datetime.now()) - timedelta(days=days)).timestamp())
+
+    def _select(self, conn, condition: str, params: List) -> List[Dict]:
+        rows = conn.execute(f'''
+            SELECT {', '.join(NewsArchive.COLUMNS)} FROM news_named
+            WHERE {condition}
+            ORDER BY published_at
+            LIMIT ?
+        ''', params + [self.batch_size]).fetchall()
+        return [dict(zip(NewsArchive.COLUMNS, row)) for row in rows]
+
+    def archive_old(self, now: Optional[datetime] = None) -> int:
+        """
+        Переносит новости старше horizon_days в архив.
+
+        Пачка сначала записывается в архив и только потом удаляется из news.db,
+        поэтому прерванный перенос безопасно повторить.
+
+        Returns:
+            int: Сколько новостей перенесено
+        """
+        conn = self.db._connect()
+        cutoff = self._cutoff(self.horizon_days, now)
+        moved = 0
+        while True:
+            records = self._select(conn, 'published_at < ?', [cutoff])
+            if not records:
+                break
+            self.archive.store(records)
+            with conn:
+                conn.executemany('DELETE FROM news WHERE id = ?', [(r['id'],) for r in records])
+            moved += len(records)
+        return moved
+
+    def trim_cold(self, now: Optional[datetime] = None) -> int:
+        """
+        Обрезает текст новостей старше cold_days, сохранив полный текст в архиве.
+
+        Returns:
+            int: Сколько новостей обрезано
+        """
+        conn = self.db._connect()
+        cutoff = self._cutoff(self.cold_days, now)
+        limit = self.preview_chars + 1
+        trimmed = 0
+        while True:
+            records = self._select(conn, 'published_at < ? AND length(content) > ?', [cutoff, limit])
+            if not records:
+                break
+            self.archive.store(records)
+            with conn:
+                conn.executemany(
+                    'UPDATE news SET content = substr(content, 1, ?) || ? WHERE id = ?',
+                    [(self.preview_chars, '…', r['id']) for r in records]
+                )
+            trimmed += len(records)
+        return trimmed
+
+    def vacuum(self, step_pages: int = 256, max_seconds: float = 30.0, pause: float = 0.05) -> int:
+        """
+        Возвращает свободные страницы файла шагами по step_pages.
+
+        Между шагами база свободна для записи. Если файл создан без
+        auto_vacuum=INCREMENTAL, режим включается одним полным VACUUM.
+
+        Returns:
+            int: Сколько страниц освобождено
+        """
+        conn = self.db._connect()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            print("  Включение auto_vacuum=INCREMENTAL (однократный полный VACUUM)...")
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+            return 0
+
+        freed = 0
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free_pages:
+                break
+            # execute() выполняет один шаг прагмы (одну страницу), executescript - целиком
+            conn.executescript(f'PRAGMA incremental_vacuum({step_pages})')
+            freed += min(free_pages, step_pages)
+            time.sleep(pause)
+        return freed
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Все шаги политики по порядку"""
+        result = {
+            'archived': self.archive_old(now),
+            'trimmed': self.trim_cold(now),
+        }
+        result['vacuumed_pages'] = self.vacuum()
+        return result
+
+
+def main():
+    """Запуск политики хранения для news.db"""
+    from database import NewsDB
+
+    parser = argparse.ArgumentParser(description='Архивирование старых новостей и сжатие news.db')
+    parser.add_argument('--db', default='news.db')
+    parser.add_argument('--horizon-days', type=int, default=180)
+    parser.add_argument('--cold-days', type=int, default=30)
+    args = parser.parse_args()
+
+    print("="*70)
+    print(f"ХРАНЕНИЕ НОВОСТЕЙ: архив старше {args.horizon_days} дн., "
+          f"обрезка текста старше {args.cold_days} дн.")
+    print("="*70)
+
+    db = NewsDB(args.db)
+    policy = RetentionPolicy(db, horizon_days=args.horizon_days, cold_days=args.cold_days)
+    result = policy.run()
+    db.close()
+
+    print(f"✓ Перенесено в архив ({policy.archive.archive_dir}): {result['archived']}")
+    print(f"✓ Обрезан текст: {result['trimmed']}")
+    print(f"✓ Освобождено страниц: {result['vacuumed_pages']}")
+
+
+if __name__ == '__main__':
+    main()
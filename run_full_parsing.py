@@ -4,10 +4,14 @@
 import json
 import os
 from datetime import datetime
+from http_cache import HTTPCache
+from crawl_state import CrawlState
+from rbc_feeds import RBCFeedFetcher
 from rbc_parser import RBCParser
 from rbc_investments_parser import RBCInvestmentsParser
-from telegram_selenium_parser import TelegramSeleniumParser
+from telegram_http_parser import TelegramHTTPParser
 from database import NewsDB
+from article_fetcher import ArticleFetcher
 
 
 def save_results(data, filename):
@@ -19,70 +23,90 @@ def save_results(data, filename):
     print(f"✓ Файл сохранен: {filepath}")
 
 
-def import_to_db(telegram_results, rbc_sber_results, rbc_inv_results):
-    """Импортирует результаты в базу данных"""
+def import_to_db(telegram_results, rbc_sber_results, rbc_inv_results, articles=None):
+    """
+    Импортирует результаты в базу данных
+    
+    Args:
+        articles: ArticleFetcher для загрузки полного текста статей РБК
+                  (None - в content сохраняется заголовок)
+    """
     db = NewsDB()
     
     print("\n" + "="*70)
     print("ИМПОРТ В БАЗУ ДАННЫХ")
     print("="*70)
     
+    # Полный текст загружается только для статей, которых еще нет в БД с текстом
+    rbc_results = rbc_sber_results + rbc_inv_results
+    if articles is not None:
+        print("\n📄 Загрузка текста статей РБК...")
+        stored = db.existing_urls((news['url'] for news in rbc_results), with_content=True)
+        articles.enrich(rbc_results, skip=stored)
+        print(f"✅ Из кэша: {articles.cached}, загружено: {articles.fetched}, "
+              f"ошибок: {articles.failed}, уже в БД с текстом: {len(stored)}")
+    
     # Импорт Telegram (Сбербанк)
     print("\n📱 Импорт Telegram (Сбербанк)...")
-    telegram_count = 0
-    for news in telegram_results:
-        title = news['text'][:100] + '...' if len(news['text']) > 100 else news['text']
-        success = db.add_news(
-            title=title,
-            content=news['text'],
-            date=news['date'] + ' 00:00:00',
-            source='Telegram @markettwits',
-            url=news['post_url'],
-            category='sberbank'
-        )
-        if success:
-            telegram_count += 1
-    print(f"✅ {telegram_count} постов")
+    telegram_count, duplicates = db.add_news_bulk(
+        {
+            'title': news['text'][:100] + '...' if len(news['text']) > 100 else news['text'],
+            'content': news['text'],
+            'date': news['date'] + ' 00:00:00',
+            'published': news.get('published'),
+            'source': 'Telegram @markettwits',
+            'url': news['post_url'],
+            'category': 'sberbank'
+        }
+        for news in telegram_results
+    )
+    print(f"✅ {telegram_count} постов (уже в базе: {duplicates})")
     
     # Импорт РБК (Сбербанк)
     print("\n📰 Импорт РБК (Сбербанк)...")
-    rbc_sber_count = 0
-    for news in rbc_sber_results:
-        success = db.add_news(
-            title=news['title'],
-            content=news['title'],
-            date=news['date'] + ' 00:00:00',
-            source='РБК',
-            url=news['url'],
-            category='sberbank'
-        )
-        if success:
-            rbc_sber_count += 1
-    print(f"✅ {rbc_sber_count} статей")
+    rbc_sber_count, duplicates = db.add_news_bulk(
+        {
+            'title': news['title'],
+            'content': news.get('content') or news['title'],
+            'date': news['date'] + ' 00:00:00',
+            'published': news.get('published'),
+            'source': 'РБК',
+            'url': news['url'],
+            'category': 'sberbank'
+        }
+        for news in rbc_sber_results
+    )
+    print(f"✅ {rbc_sber_count} статей (уже в базе: {duplicates})")
     
     # Импорт РБК (инвестиции)
     print("\n📊 Импорт РБК (инвестиции)...")
-    rbc_inv_count = 0
-    for news in rbc_inv_results:
-        success = db.add_news(
-            title=news['title'],
-            content=news['title'],
-            date=news['date'] + ' 00:00:00',
-            source='РБК Инвестиции',
-            url=news['url'],
-            category='general'
-        )
-        if success:
-            rbc_inv_count += 1
-    print(f"✅ {rbc_inv_count} статей")
+    rbc_inv_count, duplicates = db.add_news_bulk(
+        {
+            'title': news['title'],
+            'content': news.get('content') or news['title'],
+            'date': news['date'] + ' 00:00:00',
+            'published': news.get('published'),
+            'source': 'РБК Инвестиции',
+            'url': news['url'],
+            'category': 'general'
+        }
+        for news in rbc_inv_results
+    )
+    print(f"✅ {rbc_inv_count} статей (уже в базе: {duplicates})")
+    
+    if articles is not None:
+        # Сохраненным раньше без текста статьям дописываем загруженный текст
+        filled = db.fill_content(rbc_results)
+        if filled:
+            print(f"✅ Дополнено текстом ранее сохраненных статей: {filled}")
     
     print("\n" + "="*70)
     print(f"📊 ИТОГО В БАЗЕ:")
-    all_news = db.get_all_news()
-    sber_news = db.get_all_news(category='sberbank')
-    print(f"  Всего новостей: {len(all_news)}")
-    print(f"  Про Сбербанк: {len(sber_news)}")
-    print(f"  Общих (инвестиции): {len(all_news) - len(sber_news)}")
+    stats = db.get_stats()
+    sber_count = stats['by_category'].get('sberbank', 0)
+    print(f"  Всего новостей: {stats['total']}")
+    print(f"  Про Сбербанк: {sber_count}")
+    print(f"  Общих (инвестиции): {stats['total'] - sber_count}")
     print("="*70)
 
 
@@ -94,12 +118,21 @@ def main():
     print(f"Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70)
     
+    # Общие RSS-ленты: скачиваются один раз для обоих парсеров РБК,
+    # неизменившиеся ленты и страницы берутся из дискового HTTP-кэша.
+    # Оба парсера создаются заранее, чтобы лента читалась сразу до самой
+    # ранней из их границ по дате.
+    # Состояние инкрементального обхода: обрабатывается только новое содержимое
+    crawl_state = CrawlState()
+    rbc_feed = RBCFeedFetcher(cache=HTTPCache(), state=crawl_state)
+    rbc_inv_parser = RBCInvestmentsParser(feed=rbc_feed)
+    rbc_sber_parser = RBCParser(feed=rbc_feed)
+    
     # ========== 1. РБК ИНВЕСТИЦИИ ==========
     print("\n\n🔵 ШАГ 1/3: ПАРСИНГ РБК (ИНВЕСТИЦИИ)")
     print("-"*70)
     
     try:
-        rbc_inv_parser = RBCInvestmentsParser()
         rbc_inv_results = rbc_inv_parser.parse()
         save_results(rbc_inv_results, 'rbc_investments_results.json')
     except Exception as e:
@@ -111,7 +144,6 @@ def main():
     print("-"*70)
     
     try:
-        rbc_sber_parser = RBCParser()
         rbc_sber_results = rbc_sber_parser.parse()
         save_results(rbc_sber_results, 'rbc_results.json')
     except Exception as e:
@@ -123,7 +155,13 @@ def main():
     print("-"*70)
     
     try:
-        telegram_parser = TelegramSeleniumParser(headless=True)
+        # По умолчанию превью канала читается по HTTP; Chrome нужен только
+        # при TELEGRAM_BACKEND=selenium
+        if os.environ.get('TELEGRAM_BACKEND', 'http') == 'selenium':
+            from telegram_selenium_parser import TelegramSeleniumParser
+            telegram_parser = TelegramSeleniumParser(headless=True, state=crawl_state)
+        else:
+            telegram_parser = TelegramHTTPParser(state=crawl_state)
         telegram_results = telegram_parser.parse_channel(
             channel_name='markettwits',
             target_messages=1000
@@ -136,7 +174,11 @@ def main():
         telegram_results = []
     
     # ========== 4. ИМПОРТ В БД ==========
-    import_to_db(telegram_results, rbc_sber_results, rbc_inv_results)
+    articles = ArticleFetcher(engine=rbc_feed.cache.engine)
+    import_to_db(telegram_results, rbc_sber_results, rbc_inv_results, articles=articles)
+    
+    # Отметки обхода сохраняются только после записи новостей в БД
+    crawl_state.save()
     
     # ========== ИТОГОВАЯ СТАТИСТИКА ==========
     print("\n\n" + "="*70)
@@ -146,6 +188,10 @@ def main():
     print(f"📰 РБК (Сбербанк): {len(rbc_sber_results)} статей")
     print(f"💬 Telegram: {len(telegram_results)} постов")
     print("="*70)
+    for host, health in rbc_feed.cache.engine.throttle.snapshot().items():
+        print(f"🌐 {host}: {health['state']}, {health['rate']} запр/сек, "
+              f"ошибок {health['errors']}/{health['requests']}")
+    print("="*70)
     print("🌐 Запустите Flask: python3 app.py")
     print("="*70 + "\n")
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# Стеммер русского языка (алгоритм Snowball) для полнотекстового поиска
+
+import re
+from functools import lru_cache
+from typing import List
+
+_WORD = re.compile(r'[0-9a-zа-яё]+')
+_CYRILLIC = re.compile(r'[а-я]')
+_VOWELS = set('аеиоуыэюя')
+
+# Окончания по группам алгоритма Snowball. Окончания групп *_AFTER_A
+# удаляются, только если перед ними стоит 'а' или 'я' (сама буква остается).
+_PERFECTIVE_GERUND_AFTER_A = ('в', 'вши', 'вшись')
+_PERFECTIVE_GERUND = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+_REFLEXIVE = ('ся', 'сь')
+_ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+_PARTICIPLE_AFTER_A = ('ем', 'нн', 'вш', 'ющ', 'щ')
+_PARTICIPLE = ('ивш', 'ывш', 'ующ')
+_VERB_AFTER_A = (
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+)
+_VERB = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+    'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+_NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий',
+    'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю',
+    'ия', 'ья', 'я',
+)
+_DERIVATIONAL = ('ост', 'ость')
+_SUPERLATIVE = ('ейш', 'ейше')
+
+# Служебные слова не индексируются: они есть почти в каждом тексте и только
+# замедляют ранжирование (список стоп-слов Snowball, сокращенный)
+STOPWORDS = frozenset("""
+и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только
+ее мне было вот от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни
+быть был него до вас нибудь опять уж вам ведь там потом себя ничего ей может они тут где
+есть надо ней для мы тебя их чем была сам чтоб без будто чего раз тоже себе под будет ж
+тогда кто этот того потому этого какой совсем ним здесь этом один почти мой тем чтобы нее
+сейчас были куда зачем всех никогда можно при наконец два об другой хоть после над больше
+тот через эти нас про всего них какая много разве три эту моя впрочем хорошо свою этой
+перед иногда лучше чуть том нельзя такой им более всегда конечно всю между это также
+""".split())
+
+
+def _regions(word: str):
+    """Границы областей RV и R2 алгоритма Snowball"""
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in _VOWELS:
+            rv = i + 1
+            break
+
+    def next_region(start: int) -> int:
+        for i in range(start + 1, len(word)):
+            if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = next_region(0)
+    r2 = next_region(r1)
+    return rv, r2
+
+
+def _remove(word: str, start: int, endings, endings_after_a=()) -> str:
+    """
+    Удаляет самое длинное подходящее окончание, целиком лежащее в области
+    с позиции start. Возвращает None, если окончание не найдено.
+    """
+    best, after_a = '', False
+    for ending in endings:
+        if len(ending) > len(best) and word.endswith(ending) and len(word) - len(ending) >= start:
+            best, after_a = ending, False
+    for ending in endings_after_a:
+        if len(ending) > len(best) and word.endswith(ending) and len(word) - len(ending) >= start:
+            best, after_a = ending, True
+    if not best:
+        return None
+    stem = word[:-len(best)]
+    if after_a and not (len(stem) > start and stem[-1] in 'ая'):
+        return None
+    return stem
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Основа русского слова в нижнем регистре ('ё' заменяется на 'е')"""
+    word = word.lower().replace('ё', 'е')
+    if not _CYRILLIC.search(word):
+        return word
+
+    rv, r2 = _regions(word)
+
+    # Шаг 1: деепричастие, иначе возвратная частица и окончание прилагательного/глагола/существительного
+    stemmed = _remove(word, rv, _PERFECTIVE_GERUND, _PERFECTIVE_GERUND_AFTER_A)
+    if stemmed is None:
+        word = _remove(word, rv, _REFLEXIVE) or word
+        stemmed = _remove(word, rv, _ADJECTIVE)
+        if stemmed is not None:
+            stemmed = _remove(stemmed, rv, _PARTICIPLE, _PARTICIPLE_AFTER_A) or stemmed
+        else:
+            stemmed = _remove(word, rv, _VERB, _VERB_AFTER_A)
+            if stemmed is None:
+                stemmed = _remove(word, rv, _NOUN)
+    word = stemmed if stemmed is not None else word
+
+    # Шаг 2: конечное 'и'
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2
+    word = _remove(word, r2, _DERIVATIONAL) or word
+
+    # Шаг 4: превосходная степень, удвоенное 'н', мягкий знак
+    word = _remove(word, rv, _SUPERLATIVE) or word
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    return word
+
+
+def stem_words(text: str) -> List[str]:
+    """Основы слов текста по порядку, без служебных слов"""
+    return [stem(word) for word in _WORD.findall(text.lower().replace('ё', 'е')) if word not in STOPWORDS]
+
+
+def stem_text(text) -> str:
+    """Текст из основ слов через пробел - так он хранится в полнотекстовом индексе"""
+    return ' '.join(stem_words(text)) if text else ''
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# Парсер Telegram через HTTP (t.me/s) без браузера
+
+import re
+import requests
+from lxml import etree, html
+from typing import Dict, List, Optional
+from keyword_matcher import SBERBANK_KEYWORDS, TOPIC_MATCHER
+from date_utils import DateParser
+from crawl_state import CrawlState
+from fetch_engine import FetchEngine
+
+# XPath-выражения компилируются один раз при импорте модуля
+_MESSAGES = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' tgme_widget_message ')][@data-post]"
+)
+_MESSAGE_TEXT = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' tgme_widget_message_text ')]"
+)
+_MESSAGE_TIME = etree.XPath(".//time[@datetime]")
+_MESSAGE_LINK = etree.XPath(
+    ".//a[contains(concat(' ', normalize-space(@class), ' '), ' tgme_widget_message_date ')]"
+)
+
+_PARSER = html.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+class TelegramHTTPParser:
+    """
+    Парсер публичного превью канала https://t.me/s/<канал>.
+
+    Вместо прокрутки страницы в Chrome листает превью запросами
+    ?before=<id>: каждая страница (~20 постов) разбирается сразу после
+    загрузки, поэтому в памяти не держится весь DOM канала.
+    """
+
+    KEYWORDS = SBERBANK_KEYWORDS
+
+    # Публичное превью канала
+    CHANNEL_URL = 'https://t.me/s/{channel}'
+
+    def __init__(self, state: Optional[CrawlState] = None, engine: Optional[FetchEngine] = None):
+        """
+        Args:
+            state: Состояние инкрементального обхода: листание останавливается
+                   на постах, обработанных в прошлых запусках (None - полный обход)
+            engine: Движок загрузки (общая сессия и лимиты частоты запросов)
+        """
+        self.state = state
+        self.engine = engine or FetchEngine(per_host_rate=4.0, per_host_burst=4.0)
+
+    @staticmethod
+    def _post_id(value: Optional[str]) -> Optional[int]:
+        """Номер поста из 'channel/123' или 'https://t.me/channel/123'"""
+        match = re.search(r'/(\d+)$', value or '')
+        return int(match.group(1)) if match else None
+
+    def _contains_keyword(self, text: str) -> bool:
+        """Проверяет наличие ключевых слов"""
+        return TOPIC_MATCHER.matches(text, 'sberbank')
+
+    def _fetch_page(self, channel_name: str, before: Optional[int]) -> List[Dict]:
+        """
+        Загружает и разбирает одну страницу превью канала.
+
+        Returns:
+            List[Dict]: {'id', 'text', 'datetime', 'href'} в порядке страницы (от старых к новым)
+        """
+        url = self.CHANNEL_URL.format(channel=channel_name)
+        params = {'before': before} if before is not None else None
+        response = self.engine.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        if not response.content.strip():
+            return []
+
+        root = html.fromstring(response.content, parser=_PARSER)
+        messages = []
+        for message in _MESSAGES(root):
+            text_div = _MESSAGE_TEXT(message)
+            time_elem = _MESSAGE_TIME(message)
+            link_elem = _MESSAGE_LINK(message)
+            messages.append({
+                'id': self._post_id(message.get('data-post')),
+                # Аналог BeautifulSoup.get_text(strip=True)
+                'text': ''.join(part.strip() for part in text_div[0].itertext()) if text_div else None,
+                'datetime': time_elem[0].get('datetime') if time_elem else None,
+                'href': link_elem[0].get('href') if link_elem else None,
+            })
+        return messages
+
+    def parse_channel(self, channel_name: str, target_messages=1000) -> List[Dict]:
+        """
+        Парсит публичный Telegram-канал
+
+        Args:
+            channel_name: Имя канала без @ (например, 'markettwits')
+            target_messages: Сколько последних сообщений просмотреть
+
+        Returns:
+            List[Dict]: Список постов с упоминанием Сбербанка
+        """
+        print("="*70)
+        print(f"ПАРСЕР TELEGRAM @{channel_name} (HTTP) - Поиск упоминаний Сбербанка")
+        print("="*70)
+
+        results = []
+        seen_urls = set()
+        dates = DateParser()
+
+        source = f"telegram:{channel_name}"
+        known_id = self.state.last_id(source) if self.state is not None else None
+
+        newest_id = None
+        before = None
+        total_messages = 0
+        page_number = 0
+        # Отметка сдвигается, только если просмотрены все посты новее нее
+        caught_up = False
+
+        try:
+            while total_messages < target_messages:
+                messages = self._fetch_page(channel_name, before)
+                page_ids = [m['id'] for m in messages if m['id'] is not None]
+                if not page_ids:
+                    print("  Достигнут конец канала")
+                    caught_up = True
+                    break
+
+                page_number += 1
+                total_messages += len(messages)
+                print(f"  [Страница {page_number}] Просмотрено сообщений: {total_messages}/{target_messages}")
+
+                for message in messages:
+                    message_id = message['id']
+                    if message_id is not None:
+                        # Пропускаем посты из прошлых запусков
+                        if known_id is not None and message_id <= known_id:
+                            continue
+                        newest_id = max(newest_id or 0, message_id)
+
+                    text = message['text']
+                    if not text or not self._contains_keyword(text):
+                        continue
+
+                    date_obj = dates.parse(message['datetime'])
+                    if date_obj is None:
+                        continue
+                    date_str = date_obj.strftime('%Y-%m-%d')
+
+                    post_url = message['href'] or f"https://t.me/{channel_name}"
+                    if post_url in seen_urls:
+                        continue
+                    seen_urls.add(post_url)
+
+                    results.append({
+                        'text': text[:200] + '...' if len(text) > 200 else text,
+                        'date': date_str,
+                        'published': date_obj.isoformat(),
+                        'post_url': post_url
+                    })
+
+                    print(f"  ✓ [ID {self._post_id(message['href'])}] [{date_str}] {text[:60]}...")
+
+                oldest_id = min(page_ids)
+                if known_id is not None and oldest_id <= known_id:
+                    print("  Дошли до постов, обработанных в прошлых запусках")
+                    caught_up = True
+                    break
+                if before is not None and oldest_id >= before:
+                    # Страница не сдвинулась к более старым постам
+                    print("  Достигнут конец канала")
+                    caught_up = True
+                    break
+                before = oldest_id
+            else:
+                # Первый запуск ограничен target_messages последними постами
+                caught_up = known_id is None
+
+        except requests.exceptions.RequestException as e:
+            print(f"\n✗ Ошибка загрузки: {e}")
+
+        if self.state is not None and newest_id is not None:
+            if caught_up:
+                self.state.remember(source, last_id=newest_id)
+            else:
+                # Посты между known_id и последней страницей не просмотрены:
+                # следующий запуск пройдет их заново
+                print("  ⚠ Обход прерван до постов прошлых запусков, отметка канала не сдвинута")
+
+        if dates.failures:
+            print(f"\n⚠ Пропущено постов с неразобранной датой: {dates.failures}")
+
+        print("\n" + "="*70)
+        print(f"✅ Найдено постов с упоминанием Сбербанка: {len(results)}")
+        print("="*70)
+
+        return results
+
+
+def main():
+    """Тестовый запуск парсера"""
+    parser = TelegramHTTPParser()
+    results = parser.parse_channel('markettwits', target_messages=1000)
+
+    # Выводим результаты
+    print("\nРезультаты:")
+    for i, post in enumerate(results, 1):
+        print(f"\n{i}. [{post['date']}] {post['text'][:80]}...")
+        print(f"   URL: {post['post_url']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,33 +4,133 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
 import time
-from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 import re
+from keyword_matcher import SBERBANK_KEYWORDS, TOPIC_MATCHER
+from date_utils import DateParser
+from crawl_state import CrawlState
+from browser_pool import BrowserPool
+
+
+# Скрипт в странице: возвращает компактные данные еще не обработанных
+# сообщений и помечает их; при prune удаляет обработанные узлы из DOM,
+# оставляя самое старое сообщение (по нему определяется ID и идет подгрузка).
+# Текст собирается как BeautifulSoup.get_text(strip=True).
+_EXTRACT_SCRIPT = """
+var prune = arguments[0];
+var nodes = document.querySelectorAll('.tgme_widget_message[data-post]:not([data-parsed])');
+var batch = [];
+for (var i = 0; i < nodes.length; i++) {
+    var node = nodes[i];
+    node.setAttribute('data-parsed', '1');
+    var textDiv = node.querySelector('.tgme_widget_message_text');
+    var text = null;
+    if (textDiv) {
+        var parts = [];
+        var walker = document.createTreeWalker(textDiv, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            parts.push(walker.currentNode.nodeValue.trim());
+        }
+        text = parts.join('');
+    }
+    var time = node.querySelector('time[datetime]');
+    var link = node.querySelector('a.tgme_widget_message_date');
+    batch.push({
+        post: node.getAttribute('data-post'),
+        datetime: time ? time.getAttribute('datetime') : null,
+        text: text,
+        href: link ? link.getAttribute('href') : null
+    });
+}
+if (prune) {
+    var parsed = document.querySelectorAll('.tgme_widget_message[data-parsed]');
+    for (var j = 1; j < parsed.length; j++) {
+        var wrap = parsed[j].closest('.tgme_widget_message_wrap') || parsed[j];
+        wrap.remove();
+    }
+}
+return batch;
+"""
+
+# Профиль "только текст": без картинок, видео, шрифтов и сторонних запросов.
+# Скрипты и стили t.me/telegram.org не блокируются - без них не работает подгрузка.
+TEXT_ONLY_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+}
+TEXT_ONLY_ARGS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-gpu',
+    '--disable-remote-fonts',
+    '--disable-extensions',
+    '--mute-audio',
+    '--autoplay-policy=user-gesture-required',
+]
+# Шаблоны URL для Network.setBlockedURLs (CDP)
+TEXT_ONLY_BLOCKED_URLS = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.ogg', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*telesco.pe/file/*',
+    '*telegram.org/img/*',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    '*google-analytics.com*', '*googletagmanager.com*',
+]
+
+# Число сообщений в DOM и data-post самого старого (первого) из них
+_STATE_SCRIPT = """
+var nodes = document.querySelectorAll('.tgme_widget_message[data-post]');
+return [nodes.length, nodes.length ? nodes[0].getAttribute('data-post') : null];
+"""
 
 
 class TelegramSeleniumParser:
     """Парсер Telegram через Selenium с автопрокруткой"""
     
-    KEYWORDS = ['сбербанк', 'сбер', 'sberbank', 'sber']
+    KEYWORDS = SBERBANK_KEYWORDS
+    
+    # Ожидание подгрузки сообщений после прокрутки, сек
+    MIN_WAIT = 1.0
+    MAX_WAIT = 10.0
+    POLL_INTERVAL = 0.1
     
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, state: Optional[CrawlState] = None,
+                 incremental: bool = True, prune_dom: bool = False, pool: Optional[BrowserPool] = None,
+                 text_only: bool = True):
         """
         Args:
             headless: Запускать браузер в фоновом режиме (без GUI)
+            state: Состояние инкрементального обхода: прокрутка останавливается
+                   на постах, обработанных в прошлых запусках (None - полный обход)
+            incremental: Извлекать новые сообщения после каждой прокрутки скриптом
+                         в странице вместо разбора page_source в конце
+            prune_dom: Удалять обработанные сообщения из DOM (только при incremental)
+            pool: Пул браузеров; без него для каждого канала запускается новый Chrome
+            text_only: Не загружать картинки, видео, шрифты и сторонние ресурсы
         """
         self.headless = headless
+        self.state = state
+        self.caught_up = False
+        self.incremental = incremental
+        self.prune_dom = prune_dom
+        self.pool = pool
+        self.text_only = text_only
         self.driver = None
         
     def _setup_driver(self):
         """Настраивает Chrome WebDriver"""
-        print("Настройка Chrome WebDriver...")
-        
+        self.driver = self._create_driver()
+    
+    def _chrome_options(self) -> Options:
+        """Параметры запуска Chrome"""
         chrome_options = Options()
         
         if self.headless:
@@ -41,10 +141,28 @@ class TelegramSeleniumParser:
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
         
+        if self.text_only:
+            chrome_options.add_experimental_option('prefs', TEXT_ONLY_PREFS)
+            for argument in TEXT_ONLY_ARGS:
+                chrome_options.add_argument(argument)
+        
+        return chrome_options
+    
+    def _create_driver(self):
+        """Запускает новый Chrome WebDriver"""
+        print("Настройка Chrome WebDriver...")
+        
+        chrome_options = self._chrome_options()
+        
         # Для macOS: используем встроенный Chrome
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            driver = webdriver.Chrome(options=chrome_options)
+            if self.text_only:
+                # Блокировка на уровне сети: запросы не уходят вовсе
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': TEXT_ONLY_BLOCKED_URLS})
             print("✓ WebDriver инициализирован")
+            return driver
         except Exception as e:
             print(f"✗ Ошибка инициализации WebDriver: {e}")
             print("\nУстановите ChromeDriver:")
@@ -52,53 +170,135 @@ class TelegramSeleniumParser:
             print("  brew install --cask google-chrome")
             raise
     
-    def _scroll_to_load_messages(self, channel_url: str, target_messages=200):
-        """Прокручивает страницу для загрузки большего количества сообщений"""
+    def _page_state(self) -> Tuple[int, Optional[int]]:
+        """Число сообщений в DOM и ID самого старого (первого) - одним скриптом в странице"""
+        count, post = self.driver.execute_script(_STATE_SCRIPT)
+        return count, self._post_id(post)
+    
+    def _oldest_post_id(self) -> Optional[int]:
+        """ID самого старого загруженного поста (первого в DOM)"""
+        return self._page_state()[1]
+    
+    @staticmethod
+    def _post_id(value: Optional[str]) -> Optional[int]:
+        """Номер поста из 'channel/123' или 'https://t.me/channel/123'"""
+        match = re.search(r'/(\d+)$', value or '')
+        return int(match.group(1)) if match else None
+    
+    def _extract_new_messages(self) -> List[Dict]:
+        """
+        Данные сообщений, загруженных после предыдущего вызова.
+        
+        Returns:
+            List[Dict]: {'post', 'datetime', 'text', 'href'} для каждого нового сообщения
+        """
+        return self.driver.execute_script(_EXTRACT_SCRIPT, self.prune_dom)
+    
+    def _wait_for_older(self, oldest_id: Optional[int], timeout: float) -> bool:
+        """Ждет, пока в начале ленты появятся более старые посты; False по таймауту"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=self.POLL_INTERVAL).until(
+                lambda driver: self._page_state()[1] != oldest_id
+            )
+            return True
+        except TimeoutException:
+            return False
+    
+    def _scroll_to_load_messages(self, channel_url: str, target_messages=200, known_id: Optional[int] = None,
+                                 on_messages: Optional[Callable[[List[Dict]], None]] = None):
+        """
+        Прокручивает страницу для загрузки большего количества сообщений
+        
+        Вместо фиксированных пауз ждет изменения ID самого старого поста.
+        Таймаут ожидания подстраивается под наблюдаемое время подгрузки.
+        
+        Args:
+            known_id: ID последнего обработанного поста; прокрутка прекращается,
+                      когда загружены все более новые посты
+            on_messages: Обработчик новых сообщений после каждой прокрутки
+                         (инкрементальный режим); сообщения считаются по нему
+        
+        После вызова self.caught_up - загружены ли все посты новее known_id
+        (дошли до known_id или до начала канала; при первом запуске - до цели).
+        """
+        self.caught_up = False
         print(f"\nЗагружаю {channel_url}...")
         self.driver.get(channel_url)
         
         # Ждем загрузки первых сообщений
-        time.sleep(3)
+        try:
+            WebDriverWait(self.driver, self.MAX_WAIT, poll_frequency=self.POLL_INTERVAL).until(
+                lambda driver: self._page_state()[0] > 0
+            )
+        except TimeoutException:
+            print("  Сообщения не загрузились")
+            return 0
         
         print(f"Цель: загрузить {target_messages} сообщений через прокрутку...")
         
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        messages_count = 0
+        messages_count, oldest_id = self._page_state()
+        if on_messages is not None:
+            batch = self._extract_new_messages()
+            on_messages(batch)
+            messages_count = len(batch)
         scroll_attempts = 0
         max_scrolls = 50  # Максимум прокруток
+        wait_timeout = self.MAX_WAIT
         
         while messages_count < target_messages and scroll_attempts < max_scrolls:
+            if known_id is not None and oldest_id is not None and oldest_id <= known_id:
+                print("  Дошли до постов, обработанных в прошлых запусках")
+                break
+            if oldest_id == 1:
+                print("  Достигнут конец канала")
+                break
+            
             # Прокручиваем вверх (к более старым сообщениям)
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
+            started = time.monotonic()
+            loaded = self._wait_for_older(oldest_id, wait_timeout)
+            scroll_attempts += 1
             
-            # Считаем текущее количество сообщений
-            messages = self.driver.find_elements(By.CLASS_NAME, 'tgme_widget_message')
-            messages_count = len(messages)
+            if not loaded:
+                if wait_timeout < self.MAX_WAIT:
+                    # Возможно, Telegram просто ответил медленнее обычного
+                    wait_timeout = self.MAX_WAIT
+                    continue
+                print("  Более старые сообщения не загрузились")
+                break
             
-            scroll_attempts += 1
+            # Таймаут - несколько обычных времен подгрузки, в пределах MIN_WAIT..MAX_WAIT
+            elapsed = time.monotonic() - started
+            wait_timeout = max(self.MIN_WAIT, min(self.MAX_WAIT, elapsed * 4))
             
-            print(f"  [Прокрутка {scroll_attempts}] Загружено сообщений: {messages_count}/{target_messages}")
+            # Считаем текущее количество сообщений
+            count, oldest_id = self._page_state()
+            if on_messages is not None:
+                batch = self._extract_new_messages()
+                on_messages(batch)
+                messages_count += len(batch)
+            else:
+                messages_count = count
             
-            # Проверяем, появились ли новые сообщения
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height and messages_count > 20:
-                print("  Достигнут конец канала")
-                break
-            last_height = new_height
+            print(f"  [Прокрутка {scroll_attempts}] Загружено сообщений: {messages_count}/{target_messages} "
+                  f"({elapsed:.1f} сек)")
             
             # Если достигли цели - останавливаемся
             if messages_count >= target_messages:
                 print(f"  ✓ Цель достигнута: {messages_count} сообщений")
                 break
         
+        if oldest_id is not None and (oldest_id == 1 or (known_id is not None and oldest_id <= known_id)):
+            self.caught_up = True
+        elif known_id is None and messages_count >= target_messages:
+            self.caught_up = True
+        
         print(f"\n→ Итого загружено: {messages_count} сообщений")
         return messages_count
     
     def _contains_keyword(self, text: str) -> bool:
         """Проверяет наличие ключевых слов"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.KEYWORDS)
+        return TOPIC_MATCHER.matches(text, 'sberbank')
     
     def parse_channel(self, channel_name: str, target_messages=1000) -> List[Dict]:
         """
@@ -117,57 +317,40 @@ class TelegramSeleniumParser:
         
         results = []
         seen_urls = set()
+        dates = DateParser()
+        newest_id = None
         
-        try:
-            # Инициализируем WebDriver
-            self._setup_driver()
-            
-            # Формируем URL публичного просмотра
-            channel_url = f"https://t.me/s/{channel_name}"
-            
-            # Прокручиваем для загрузки сообщений
-            total_messages = self._scroll_to_load_messages(channel_url, target_messages)
-            
-            # Получаем HTML-код страницы
-            print("\nИзвлекаю данные из загруженных сообщений...")
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Находим все сообщения
-            messages = soup.find_all('div', class_='tgme_widget_message')
-            print(f"Найдено сообщений в HTML: {len(messages)}")
-            
-            # Обрабатываем каждое сообщение
+        source = f"telegram:{channel_name}"
+        known_id = self.state.last_id(source) if self.state is not None else None
+        
+        def process(messages: List[Dict]):
+            """Фильтрует сообщения {'post', 'datetime', 'text', 'href'} и добавляет найденные посты"""
+            nonlocal newest_id
             for message in messages:
                 try:
-                    # Извлекаем текст
-                    text_div = message.find('div', class_='tgme_widget_message_text')
-                    if not text_div:
-                        continue
+                    # Пропускаем посты из прошлых запусков
+                    message_id = self._post_id(message['post'])
+                    if message_id is not None:
+                        if known_id is not None and message_id <= known_id:
+                            continue
+                        newest_id = max(newest_id or 0, message_id)
                     
-                    text = text_div.get_text(strip=True)
+                    text = message['text']
+                    if not text:
+                        continue
                     
                     # Фильтруем по ключевым словам
                     if not self._contains_keyword(text):
                         continue
                     
                     # Извлекаем дату
-                    date_elem = message.find('time')
-                    date_str = None
-                    if date_elem:
-                        date_str = date_elem.get('datetime')
-                        if date_str:
-                            try:
-                                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                                date_str = date_obj.strftime('%Y-%m-%d')
-                            except:
-                                date_str = datetime.now().strftime('%Y-%m-%d')
-                    else:
-                        date_str = datetime.now().strftime('%Y-%m-%d')
+                    date_obj = dates.parse(message['datetime'])
+                    if date_obj is None:
+                        continue
+                    date_str = date_obj.strftime('%Y-%m-%d')
                     
-                    # Извлекаем ссылку на пост
-                    link_elem = message.find('a', class_='tgme_widget_message_date')
-                    post_url = link_elem.get('href') if link_elem else f"https://t.me/{channel_name}"
+                    # Ссылка на пост
+                    post_url = message['href'] or f"https://t.me/{channel_name}"
                     
                     # Проверяем дубликаты
                     if post_url in seen_urls:
@@ -175,16 +358,12 @@ class TelegramSeleniumParser:
                     seen_urls.add(post_url)
                     
                     # Извлекаем ID поста
-                    post_id = ''
-                    if link_elem:
-                        href = link_elem.get('href', '')
-                        match = re.search(r'/(\d+)$', href)
-                        if match:
-                            post_id = match.group(1)
+                    post_id = self._post_id(message['href'])
                     
                     results.append({
                         'text': text[:200] + '...' if len(text) > 200 else text,
                         'date': date_str,
+                        'published': date_obj.isoformat(),
                         'post_url': post_url
                     })
                     
@@ -192,23 +371,120 @@ class TelegramSeleniumParser:
                     
                 except Exception as e:
                     continue
+        
+        healthy = True
+        try:
+            # Инициализируем WebDriver (или берем запущенный из пула)
+            if self.pool is not None:
+                self.driver = self.pool.acquire()
+            else:
+                self._setup_driver()
+            
+            # Формируем URL публичного просмотра
+            channel_url = f"https://t.me/s/{channel_name}"
+            
+            if self.incremental:
+                # Новые сообщения извлекаются и фильтруются после каждой прокрутки
+                total_messages = self._scroll_to_load_messages(channel_url, target_messages, known_id,
+                                                               on_messages=process)
+            else:
+                # Прокручиваем для загрузки сообщений
+                total_messages = self._scroll_to_load_messages(channel_url, target_messages, known_id)
+                
+                # Получаем HTML-код страницы
+                print("\nИзвлекаю данные из загруженных сообщений...")
+                page_source = self.driver.page_source
+                soup = BeautifulSoup(page_source, 'html.parser')
+                
+                # Находим все сообщения
+                messages = soup.find_all('div', class_='tgme_widget_message')
+                print(f"Найдено сообщений в HTML: {len(messages)}")
+                
+                extracted = []
+                for message in messages:
+                    text_div = message.find('div', class_='tgme_widget_message_text')
+                    date_elem = message.find('time')
+                    link_elem = message.find('a', class_='tgme_widget_message_date')
+                    extracted.append({
+                        'post': message.get('data-post'),
+                        'datetime': date_elem.get('datetime') if date_elem else None,
+                        'text': text_div.get_text(strip=True) if text_div else None,
+                        'href': link_elem.get('href') if link_elem else None,
+                    })
+                process(extracted)
+            
+            if self.state is not None and newest_id is not None:
+                if self.caught_up:
+                    self.state.remember(source, last_id=newest_id)
+                else:
+                    # Прокрутка остановилась раньше постов прошлых запусков (например,
+                    # по таймауту): пропущенные посты пройдет следующий запуск
+                    print("  ⚠ Прокрутка прервана до постов прошлых запусков, отметка канала не сдвинута")
+            
+            if dates.failures:
+                print(f"\n⚠ Пропущено постов с неразобранной датой: {dates.failures}")
             
             print("\n" + "="*70)
             print(f"✅ Найдено постов с упоминанием Сбербанка: {len(results)}")
             print("="*70)
             
         except Exception as e:
+            healthy = False
             print(f"\n✗ Ошибка парсинга: {e}")
             import traceback
             traceback.print_exc()
             
         finally:
-            # Закрываем браузер
-            if self.driver:
+            if self.driver and self.pool is not None:
+                # Возвращаем браузер в пул (сломанный пул закроет)
+                self.pool.release(self.driver, healthy)
+                self.driver = None
+            elif self.driver:
+                # Закрываем браузер
                 self.driver.quit()
                 print("\n✓ WebDriver закрыт")
         
         return results
+    
+    def parse_channels(self, channel_names: List[str], target_messages=1000, pool_size=3) -> List[Dict]:
+        """
+        Параллельно парсит несколько каналов на пуле браузеров
+        
+        Args:
+            channel_names: Имена каналов без @
+            target_messages: Целевое количество сообщений для каждого канала
+            pool_size: Размер пула, если парсер создан без pool
+            
+        Returns:
+            List[Dict]: Посты всех каналов (с полем 'channel'), от новых к старым
+        """
+        pool = self.pool or BrowserPool(self._create_driver, size=pool_size)
+        
+        def parse_one(channel_name):
+            # Отдельный экземпляр на поток: у каждого свой self.driver
+            worker = TelegramSeleniumParser(self.headless, self.state, self.incremental,
+                                            self.prune_dom, pool=pool, text_only=self.text_only)
+            return channel_name, worker.parse_channel(channel_name, target_messages)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                parsed = list(executor.map(parse_one, channel_names))
+        finally:
+            if self.pool is None:
+                pool.close()
+        
+        merged = []
+        seen_urls = set()
+        for channel_name, posts in parsed:
+            for post in posts:
+                if post['post_url'] in seen_urls:
+                    continue
+                seen_urls.add(post['post_url'])
+                merged.append({**post, 'channel': channel_name})
+        merged.sort(key=lambda post: post['published'], reverse=True)
+        
+        print(f"\n✅ Каналов: {len(channel_names)}, постов с упоминанием Сбербанка: {len(merged)}")
+        return merged
 
 
 def main():
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# Адаптивное ограничение частоты запросов и circuit breaker по хостам
+
+import threading
+import time
+import requests
+from typing import Dict, Optional
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Хост временно отключен: запросы к нему не выполняются"""
+
+
+class HostHealth:
+    """Состояние одного хоста"""
+
+    CLOSED = 'closed'        # запросы идут как обычно
+    OPEN = 'open'            # хост отключен до истечения open_seconds
+    HALF_OPEN = 'half_open'  # пропускается один пробный запрос
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.latency: Optional[float] = None  # EWMA времени ответа, сек
+        self.error_rate = 0.0                 # EWMA доли ошибок
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.requests = 0
+        self.errors = 0
+
+
+class AdaptiveThrottle:
+    """
+    Следит за временем ответа, ошибками и ответами 429 каждого хоста.
+
+    Частота запросов меняется по схеме AIMD: медленно растет, пока хост
+    отвечает быстро, снижается при резком росте времени ответа и уменьшается
+    вдвое при 429/5xx/таймаутах. После
+    failure_threshold ошибок подряд (или при высокой доле ошибок) цепь
+    размыкается: запросы к хосту сразу завершаются CircuitOpenError, и цикл
+    обхода заканчивается с частичными результатами вместо ожидания таймаутов.
+    """
+
+    # Коэффициент сглаживания EWMA
+    ALPHA = 0.3
+
+    def __init__(self, base_rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 5.0,
+                 failure_threshold: int = 5, error_rate_threshold: float = 0.5,
+                 open_seconds: float = 60.0, min_timeout: float = 3.0, max_timeout: float = 10.0):
+        """
+        Args:
+            base_rate: Начальная частота запросов к хосту (запросов/сек)
+            min_rate: Нижняя граница частоты
+            max_rate: Верхняя граница частоты
+            failure_threshold: Ошибок подряд до размыкания цепи
+            error_rate_threshold: Доля ошибок (EWMA), при которой цепь размыкается
+            open_seconds: Сколько хост остается отключенным до пробного запроса
+            min_timeout: Минимальный таймаут запроса, сек
+            max_timeout: Максимальный таймаут запроса, сек
+        """
+        self.base_rate = base_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._hosts: Dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> HostHealth:
+        if host not in self._hosts:
+            self._hosts[host] = HostHealth(self.base_rate)
+        return self._hosts[host]
+
+    def rate(self, host: str) -> float:
+        """Текущая допустимая частота запросов к хосту"""
+        with self._lock:
+            return self._host(host).rate
+
+    def timeout(self, host: str) -> float:
+        """Таймаут по наблюдаемому времени ответа: не ждем 10 секунд от быстрого хоста"""
+        with self._lock:
+            latency = self._host(host).latency
+        if latency is None:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, latency * 4))
+
+    def before_request(self, host: str):
+        """
+        Проверяет цепь перед запросом.
+
+        Raises:
+            CircuitOpenError: хост отключен
+        """
+        with self._lock:
+            health = self._host(host)
+            if health.state == HostHealth.OPEN:
+                if time.monotonic() - health.opened_at < self.open_seconds:
+                    raise CircuitOpenError(f"{host}: цепь разомкнута после ошибок, запрос пропущен")
+                health.state = HostHealth.HALF_OPEN
+            if health.state == HostHealth.HALF_OPEN:
+                if health.probe_in_flight:
+                    raise CircuitOpenError(f"{host}: идет пробный запрос, запрос пропущен")
+                health.probe_in_flight = True
+
+    def record(self, host: str, latency: float, status_code: Optional[int] = None,
+               retry_after: Optional[float] = None):
+        """
+        Учитывает результат запроса.
+
+        Args:
+            host: Хост
+            latency: Время выполнения запроса, сек
+            status_code: Код ответа или None при сетевой ошибке/таймауте
+            retry_after: Значение Retry-After в секундах, если сервер его прислал
+        """
+        failed = status_code is None or status_code == 429 or status_code >= 500
+        with self._lock:
+            health = self._host(host)
+            health.requests += 1
+            health.probe_in_flight = False
+            previous_latency = health.latency
+            health.latency = latency if previous_latency is None else (
+                self.ALPHA * latency + (1 - self.ALPHA) * previous_latency
+            )
+            health.error_rate = self.ALPHA * float(failed) + (1 - self.ALPHA) * health.error_rate
+
+            if failed:
+                health.errors += 1
+                health.consecutive_failures += 1
+                health.rate = max(self.min_rate, health.rate / 2)
+                if retry_after:
+                    health.rate = max(self.min_rate, min(health.rate, 1 / retry_after))
+
+                too_many = (health.consecutive_failures >= self.failure_threshold
+                            or (health.requests >= self.failure_threshold
+                                and health.error_rate >= self.error_rate_threshold))
+                if health.state == HostHealth.HALF_OPEN or too_many:
+                    health.state = HostHealth.OPEN
+                    health.opened_at = time.monotonic()
+            else:
+                health.consecutive_failures = 0
+                health.state = HostHealth.CLOSED
+                if previous_latency is not None and latency > 2 * previous_latency:
+                    # Хост начал отвечать заметно медленнее - снижаем нагрузку
+                    health.rate = max(self.min_rate, health.rate * 0.75)
+                elif latency < self.min_timeout / 2:
+                    # Аддитивный рост, пока ответы быстрые
+                    health.rate = min(self.max_rate, health.rate + 0.1)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Состояние всех хостов: для логов и диагностики"""
+        with self._lock:
+            return {
+                host: {
+                    'state': health.state,
+                    'rate': round(health.rate, 2),
+                    'latency': round(health.latency, 3) if health.latency is not None else None,
+                    'error_rate': round(health.error_rate, 2),
+                    'requests': health.requests,
+                    'errors': health.errors,
+                }
+                for host, health in self._hosts.items()
+            }